@@ -1 +1 @@
-python3 src/main.py "/static_site_generator/"
\ No newline at end of file
+python3 src/cli.py build "/static_site_generator/"
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import re
+
+from manifest import hash_bytes
+from urls import URL_ATTRIBUTE_PATTERN
+
+CSS_TOKEN_PATTERN = re.compile(
+    r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|/\*.*?\*/|\s+|[{};,>]|[^\"'/\s{};,>]+|/",
+    re.DOTALL,
+)
+CSS_PUNCTUATION = "{};,>"
+# Whitespace inside these elements is significant
+PRESERVED_PATTERN = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def minify_css(css: str):
+    # Drops comments and every space that isn't needed to separate two
+    # words; strings are kept as written. Spaces after a colon only go inside
+    # blocks, as in selectors "a :hover" differs from "a:hover".
+    tokens = []
+    space = False
+    depth = 0
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        token = match.group()
+        if token.startswith("/*"):
+            continue
+        if token.isspace():
+            space = True
+            continue
+        if token in CSS_PUNCTUATION:
+            if token == "}" and tokens and tokens[-1] == ";":
+                tokens.pop()
+            depth += {"{": 1, "}": -1}.get(token, 0)
+        elif (
+            space
+            and tokens
+            and tokens[-1] not in CSS_PUNCTUATION
+            and not (depth and tokens[-1].endswith(":"))
+        ):
+            tokens.append(" ")
+        tokens.append(token)
+        space = False
+    return "".join(tokens)
+
+
+def collapse_whitespace(match):
+    # A newline is kept where there was one, so inline layout and scripts
+    # relying on line breaks behave the same
+    return "\n" if "\n" in match.group() else " "
+
+
+def minify_html(html: str):
+    parts = PRESERVED_PATTERN.split(html)
+    # split returns text, preserved element, tag name, text, ...
+    for i in range(0, len(parts), 3):
+        parts[i] = WHITESPACE_PATTERN.sub(collapse_whitespace, parts[i])
+    return "".join(part for i, part in enumerate(parts) if i % 3 != 2)
+
+
+def rewrite_asset_urls(html: str, assets: dict):
+    # assets maps URLs as they appear in the output to fingerprinted ones
+    if not any(url in html for url in assets):
+        return html
+
+    def rewrite_attribute(match):
+        url = assets.get(match.group(2), match.group(2))
+        return f'{match.group(1)}="{url}"'
+
+    return URL_ATTRIBUTE_PATTERN.sub(rewrite_attribute, html)
+
+
+# Extensions of the assets that get fingerprinted, with their minifier
+ASSET_TYPES = {".css": minify_css, ".js": None}
+
+
+def fingerprinted_path(file: str, text: str):
+    base, extension = os.path.splitext(file)
+    return f"{base}.{hash_bytes(text.encode())[:12]}{extension}"
+
+
+def build_assets(
+    static_dir: str,
+    dest_dir: str = None,
+    cache_dir: str = "./.cache/assets",
+    previous: dict = None,
+):
+    # Minifies the CSS and JS under static_dir into content-hashed files.
+    # The minified text is cached by the hash of its input, and sources whose
+    # size and mtime match the manifest aren't read at all. Without dest_dir
+    # only the records are computed, for shards. Returns the records by path
+    # relative to static_dir and how many assets were processed.
+    previous = previous or {}
+    records = {}
+    processed = 0
+
+    for root, dirs, names in os.walk(static_dir):
+        dirs.sort()
+        for name in sorted(names):
+            extension = os.path.splitext(name)[1].lower()
+            if extension not in ASSET_TYPES:
+                continue
+            source = os.path.join(root, name)
+            file = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            stat = os.stat(source)
+            record = previous.get(file)
+            if (
+                record is not None
+                and record["size"] == stat.st_size
+                and record["mtime"] == stat.st_mtime_ns
+                and os.path.exists(record["cached"])
+            ):
+                records[file] = record
+                continue
+
+            with open(source, "rb") as asset:
+                data = asset.read()
+            digest = hash_bytes(data)
+            cached = os.path.join(cache_dir, digest[:2], f"{digest}{extension}")
+            if os.path.exists(cached):
+                with open(cached, "r") as asset:
+                    text = asset.read()
+            else:
+                minify = ASSET_TYPES[extension]
+                text = data.decode()
+                text = minify(text) if minify else text
+                os.makedirs(os.path.dirname(cached), exist_ok=True)
+                tmp_path = f"{cached}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as asset:
+                    asset.write(text)
+                os.replace(tmp_path, cached)
+
+            records[file] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "hash": digest,
+                "cached": cached,
+                "output": fingerprinted_path(file, text),
+            }
+            processed += 1
+
+    if dest_dir is not None:
+        sync_assets(records, previous, dest_dir)
+    return records, processed
+
+
+def sync_assets(records: dict, previous: dict, dest_dir: str):
+    # static_sync pulls in shutil and threading, which render-one, a user of
+    # this module's page helpers, never needs
+    from static_sync import copy_file, remove_output
+
+    # Outputs are named by their content, so an existing file is up to date
+    current = set()
+    for record in records.values():
+        destination = os.path.join(dest_dir, record["output"])
+        current.add(record["output"])
+        if not os.path.exists(destination):
+            copy_file(record["cached"], destination)
+
+    for record in previous.values():
+        destination = os.path.join(dest_dir, record["output"])
+        if record["output"] not in current and os.path.exists(destination):
+            remove_output(destination, dest_dir)
@@ -0,0 +1,175 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from block import (
+    BlockType,
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+from corpus import CORPORA, write_corpus
+from inline_markdown import text_to_text_nodes
+from main import build
+
+DEFAULT_BASELINE = "./.cache/bench_baseline.json"
+
+
+def measure(run, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(timings), peak
+
+
+def corpus_benchmarks(root: str, paths: list):
+    sources = []
+    for path in paths:
+        with open(path) as file:
+            sources.append(file.read())
+    paragraphs = [
+        block
+        for source in sources
+        for block in markdown_to_blocks(source)
+        if block_to_block_type(block) == BlockType.PARAGRAPH
+    ]
+    nodes = [markdown_to_html_node(source) for source in sources]
+
+    def inline():
+        for text in paragraphs:
+            text_to_text_nodes(text)
+
+    def blocks():
+        for source in sources:
+            markdown_to_html_node(source)
+
+    def to_html():
+        for node in nodes:
+            node.to_html()
+
+    def full_build():
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                build(manifest_path=f"{root}/.cache/manifest.json")
+        finally:
+            os.chdir(cwd)
+
+    paragraph_bytes = sum(len(text.encode()) for text in paragraphs)
+    source_bytes = sum(len(source.encode()) for source in sources)
+    return [
+        ("text_to_text_nodes", inline, paragraph_bytes, None),
+        ("markdown_to_html_node", blocks, source_bytes, len(sources)),
+        ("to_html", to_html, source_bytes, len(sources)),
+        ("build", full_build, source_bytes, len(sources)),
+    ]
+
+
+def run_benchmarks(corpora: list, scale: float, repeat: int):
+    results = {}
+    for name in corpora:
+        with tempfile.TemporaryDirectory() as root:
+            paths = write_corpus(root, name, scale=scale)
+            for bench, run, size, pages in corpus_benchmarks(root, paths):
+                seconds, peak = measure(run, repeat)
+                result = {
+                    "seconds": seconds,
+                    "mb_per_second": size / 2**20 / seconds,
+                    "peak_mb": peak / 2**20,
+                }
+                if pages:
+                    result["pages_per_second"] = pages / seconds
+                results[f"{name}/{bench}"] = result
+                print(format_result(f"{name}/{bench}", result), flush=True)
+    return results
+
+
+def format_result(name: str, result: dict):
+    pages = result.get("pages_per_second")
+    pages = f"{pages:10.0f} pages/s" if pages else " " * 18
+    return (
+        f"{name:<30} {result['seconds'] * 1000:10.1f} ms"
+        f" {result['mb_per_second']:8.2f} MB/s {pages}"
+        f" {result['peak_mb']:8.2f} MB peak"
+    )
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["seconds"] / baseline[name]["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {ratio:.2f}x the baseline time")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline")
+    parser.add_argument(
+        "--corpus",
+        action="append",
+        choices=sorted(CORPORA),
+        help="corpus to run (repeatable, default: all)",
+    )
+    parser.add_argument("--scale", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against the baseline before failing (0.25 = 25%%)",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.corpus or sorted(CORPORA), args.scale, args.repeat)
+
+    if args.save:
+        directory = os.path.dirname(args.baseline)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump({"scale": args.scale, "results": results}, file, indent=1)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --save to create one")
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline["scale"] != args.scale:
+        sys.exit(f"Baseline was recorded at scale {baseline['scale']}")
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import random
+import re
+import timeit
+
+from block import (
+    BlockType,
+    LIST_ITEM_PATTERN,
+    HEADING_CONTENT_PATTERN,
+    block_to_html_node,
+    iter_blocks,
+    lines_to_block_type,
+    markdown_to_lines,
+)
+from corpus import page_markdown
+from html_node import LeafNode, ParentNode
+from inline_markdown import text_to_text_nodes
+from text_node import TextType, text_node_to_html_node
+from urls import rewrite_url
+
+
+# The classification that built an ordered-list pattern for every line, and
+# the if/elif versions that the dispatch tables replaced, kept as the baseline
+def legacy_block_to_block_type(block: str):
+    lines = block.split("\n")
+
+    if block.startswith("```") and block.endswith("```"):
+        return BlockType.CODE
+
+    if all(line.startswith(">") for line in lines):
+        return BlockType.QUOTE
+
+    if len(lines) > 0:
+        if all(re.match(r"^[*\-]\s", line) for line in lines):
+            return BlockType.UNORDERED_LIST
+
+        ordered = True
+        for i, line in enumerate(lines):
+            if not re.match(rf"^{i+1}\.\s", line):
+                ordered = False
+                break
+        if ordered:
+            return BlockType.ORDERED_LIST
+
+    if re.match(r"^#{1,6}\s", block):
+        return BlockType.HEADING
+
+    return BlockType.PARAGRAPH
+
+
+def legacy_text_node_to_html_node(text_node, basepath: str = "/"):
+    if text_node.text_type == TextType.TEXT:
+        return LeafNode(value=text_node.text)
+    elif text_node.text_type == TextType.BOLD:
+        return LeafNode(tag="b", value=text_node.text)
+    elif text_node.text_type == TextType.ITALIC:
+        return LeafNode(tag="i", value=text_node.text)
+    elif text_node.text_type == TextType.CODE:
+        return LeafNode(tag="code", value=text_node.text)
+    elif text_node.text_type == TextType.LINK:
+        return LeafNode(
+            tag="a",
+            value=text_node.text,
+            props={"href": rewrite_url(text_node.url, basepath)},
+        )
+    elif text_node.text_type == TextType.IMAGE:
+        return LeafNode(
+            tag="img",
+            value="",
+            props={"src": rewrite_url(text_node.url, basepath), "alt": text_node.text},
+        )
+    else:
+        raise ValueError(f"Invalid text type: {text_node.text_type}")
+
+
+def legacy_text_to_children(text: str, basepath: str = "/"):
+    text_nodes = text_to_text_nodes(text)
+    return [legacy_text_node_to_html_node(node, basepath) for node in text_nodes]
+
+
+def legacy_parent_tag(block_type: BlockType):
+    return {
+        BlockType.PARAGRAPH: "p",
+        BlockType.HEADING: "h",
+        BlockType.CODE: "pre",
+        BlockType.QUOTE: "blockquote",
+        BlockType.UNORDERED_LIST: "ul",
+        BlockType.ORDERED_LIST: "ol",
+    }.get(block_type, "div")
+
+
+def legacy_block_to_html_node(lines, block, block_type, basepath="/"):
+    if block_type == BlockType.HEADING:
+        match = HEADING_CONTENT_PATTERN.match(block)
+        if not match:
+            raise ValueError(f"Invalid heading format: {block}")
+        level = len(match.group(1))
+        content = match.group(2)
+        return ParentNode(f"h{level}", legacy_text_to_children(content, basepath))
+
+    if block_type == BlockType.CODE:
+        code_content = block.strip("```").split("\n", 1)[-1].strip()
+        code_node = LeafNode(tag="code", value=code_content)
+        return ParentNode("pre", [code_node])
+
+    if block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+        items = []
+        for line in lines:
+            parts = LIST_ITEM_PATTERN.split(line, maxsplit=1)
+            content = parts[1] if len(parts) > 1 else ""
+            items.append(ParentNode("li", legacy_text_to_children(content, basepath)))
+        return ParentNode(legacy_parent_tag(block_type), items)
+
+    if block_type == BlockType.QUOTE:
+        quote_content = " ".join(line.lstrip("> ").strip() for line in lines)
+        children = legacy_text_to_children(quote_content, basepath)
+        return ParentNode("blockquote", children)
+
+    return ParentNode("p", legacy_text_to_children(block, basepath))
+
+
+def list_heavy_blocks(pages: int = 20, items: int = 200):
+    rng = random.Random("bench_block")
+    blocks = []
+    for _ in range(pages):
+        markdown = page_markdown(rng, paragraphs=2, links=1, items=items)
+        for lines in iter_blocks(markdown_to_lines(markdown)):
+            block = "\n".join(lines)
+            blocks.append((lines, block, lines_to_block_type(lines, block)))
+    return blocks
+
+
+def bench(function, blocks: list, repeat: int = 5):
+    def run():
+        for lines, block, block_type in blocks:
+            function(lines, block, block_type, "/")
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / len(blocks)
+
+
+def main():
+    blocks = list_heavy_blocks()
+    for lines, block, block_type in blocks:
+        assert legacy_block_to_block_type(block) == block_type
+        assert (
+            block_to_html_node(lines, block, block_type).to_html()
+            == legacy_block_to_html_node(lines, block, block_type).to_html()
+        )
+
+    print(f"{'':>16} {'count':>7} {'before':>12} {'after':>12} {'':>8}")
+    for block_type in BlockType:
+        typed = [entry for entry in blocks if entry[2] == block_type]
+        if not typed:
+            continue
+        legacy = bench(legacy_block_to_html_node, typed)
+        dispatch = bench(block_to_html_node, typed)
+        print(
+            f"{block_type.value:>16} {len(typed):>7} {legacy * 1e6:>9.1f} us"
+            f" {dispatch * 1e6:>9.1f} us {legacy / dispatch:>7.2f}x"
+        )
+
+    legacy = min(
+        timeit.repeat(
+            lambda: [legacy_block_to_block_type(block) for _, block, _ in blocks],
+            number=1,
+        )
+    )
+    current = min(
+        timeit.repeat(
+            lambda: [lines_to_block_type(lines, block) for lines, block, _ in blocks],
+            number=1,
+        )
+    )
+    print(
+        f"{'classification':>16} {len(blocks):>7} {legacy / len(blocks) * 1e6:>9.2f} us"
+        f" {current / len(blocks) * 1e6:>9.2f} us {legacy / current:>7.2f}x"
+    )
+
+    nodes = [node for _, block, _ in blocks for node in text_to_text_nodes(block)]
+    legacy = min(
+        timeit.repeat(lambda: list(map(legacy_text_node_to_html_node, nodes)), number=1)
+    )
+    dispatch = min(
+        timeit.repeat(lambda: list(map(text_node_to_html_node, nodes)), number=1)
+    )
+    print(
+        f"{'text nodes':>16} {len(nodes):>7} {legacy / len(nodes) * 1e6:>9.2f} us"
+        f" {dispatch / len(nodes) * 1e6:>9.2f} us {legacy / dispatch:>7.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
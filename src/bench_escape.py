@@ -0,0 +1,108 @@
+import itertools
+import random
+import re
+import timeit
+
+from block import markdown_to_html_node
+from corpus import page_markdown
+from html_node import ATTRIBUTE_CACHE, LeafNode, ParentNode, iter_html
+
+
+# The renderer as it was before escaping, kept as the baseline
+def unescaped_props_to_html(node):
+    props = ""
+
+    if node.props:
+        for k, v in node.props.items():
+            props += f' {k}="{v}"'
+
+    return props
+
+
+def unescaped_leaf_to_html(node):
+    if node.value is None:
+        raise ValueError("invalid HTML: no value")
+
+    return (
+        f"<{node.tag}{unescaped_props_to_html(node)}>{node.value}</{node.tag}>"
+        if node.tag != None
+        else f"{node.value}"
+    )
+
+
+def unescaped_iter_html(node):
+    stack = [node]
+
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        if isinstance(item, LeafNode):
+            yield unescaped_leaf_to_html(item)
+            continue
+        if not isinstance(item, ParentNode):
+            yield item.to_html()
+            continue
+
+        yield f"<{item.tag}{unescaped_props_to_html(item)}>"
+        stack.append(f"</{item.tag}>")
+        for child in reversed(item.children):
+            if child.tag == item.tag and child.value:
+                stack.append(child.value)
+            else:
+                stack.append(child)
+
+
+def site_nodes(pages: int, links: int, items: int, special: bool, unique: bool):
+    rng = random.Random("bench_escape")
+    urls = itertools.count()
+    nodes = []
+    for _ in range(pages):
+        markdown = page_markdown(rng, paragraphs=10, links=links, items=items)
+        if unique:
+            # The corpus draws links from 1000 URLs; on most sites they differ
+            markdown = re.sub(
+                r"\(/blog/\d+\)", lambda _: f"(/p/{next(urls)})", markdown
+            )
+        if special:
+            # Something to escape in a share of the blocks, e.g. code samples
+            markdown = markdown.replace(" the fires ", " the <fires> & ")
+        nodes.append(markdown_to_html_node(markdown))
+    return nodes
+
+
+def bench(renderers: list, nodes: list, repeat: int = 15):
+    # Alternates the renderers each round so load on the machine hits both
+    timings = [[] for _ in renderers]
+    for _ in range(repeat):
+        for render, times in zip(renderers, timings):
+            times.append(
+                timeit.timeit(
+                    lambda: ["".join(render(node)) for node in nodes], number=1
+                )
+            )
+    return [min(times) / len(nodes) for times in timings]
+
+
+def main():
+    corpora = (
+        ("links", 100, 20, 0, False, False),
+        ("unique links", 100, 20, 0, False, True),
+        ("lists", 100, 1, 100, False, False),
+        ("links+special", 100, 20, 0, True, False),
+    )
+
+    print(f"{'corpus':>14} {'unescaped':>12} {'escaped':>12} {'':>8}")
+    for name, pages, links, items, special, unique in corpora:
+        nodes = site_nodes(pages, links, items, special, unique)
+        ATTRIBUTE_CACHE.clear()
+        unescaped, escaped = bench([unescaped_iter_html, iter_html], nodes)
+        print(
+            f"{name:>14} {unescaped * 1000:>9.3f} ms {escaped * 1000:>9.3f} ms"
+            f" {unescaped / escaped:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
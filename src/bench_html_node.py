@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+from block import markdown_to_html_node
+from html_node import LeafNode, ParentNode, iter_html
+
+
+def concat_to_html(node):
+    # ParentNode.to_html as it was before iter_html: every level copies the
+    # markup of its whole subtree into its own string
+    if not isinstance(node, ParentNode):
+        return node.to_html()
+
+    html = f"<{node.tag}{node.props_to_html()}>"
+    for child in node.children:
+        if child.tag == node.tag and child.value:
+            html += child.value
+        else:
+            html += concat_to_html(child)
+    return html + f"</{node.tag}>"
+
+
+def nested_document(depth: int, width: int):
+    node = ParentNode("li", [LeafNode("leaf " * 20)])
+    for level in range(depth):
+        items = [
+            ParentNode("li", [LeafNode(f"item {level}.{i} " * 10)])
+            for i in range(width)
+        ]
+        node = ParentNode("ul", items + [ParentNode("li", [node])])
+    return ParentNode("div", [node])
+
+
+def long_document(sections: int):
+    markdown = "\n\n".join(
+        f"## Section {i}\n\nSome **bold** text with a [link](/page/{i}).\n\n"
+        + "\n".join(f"- item {j} of section {i}" for j in range(20))
+        for i in range(sections)
+    )
+    return markdown_to_html_node(markdown)
+
+
+def measure(render):
+    tracemalloc.start()
+    start = time.perf_counter()
+    render()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    documents = [
+        ("nested 300x20", nested_document(depth=300, width=20)),
+        ("long 5000", long_document(sections=5000)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.html")
+
+        def write_concat(node):
+            with open(path, "w") as file:
+                file.write(concat_to_html(node))
+
+        def write_streaming(node):
+            with open(path, "w") as file:
+                file.writelines(iter_html(node))
+
+        renderers = (("concat", write_concat), ("streaming", write_streaming))
+        print(f"{'document':>14} {'renderer':>10} {'time':>10} {'peak memory':>12}")
+        for name, node in documents:
+            for renderer, write in renderers:
+                elapsed, peak = measure(lambda: write(node))
+                size = os.path.getsize(path)
+                print(
+                    f"{name:>14} {renderer:>10} {elapsed * 1000:>7.1f} ms"
+                    f" {peak / 2**20:>9.2f} MB  ({size / 2**20:.2f} MB output)"
+                )
+
+
+if __name__ == "__main__":
+    main()
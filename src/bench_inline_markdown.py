@@ -0,0 +1,61 @@
+import timeit
+
+from inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_text_nodes,
+)
+from text_node import TextNode, TextType
+
+
+def split_nodes_pipeline(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def link_heavy_paragraph(links: int):
+    return " ".join(
+        f"see [chapter {i}](/blog/chapter-{i}) and ![figure {i}](/images/{i}.png)"
+        for i in range(links)
+    )
+
+
+def mixed_paragraph(links: int):
+    return " ".join(
+        f"See **part {i}** in [chapter {i}](/blog/chapter-{i}) and "
+        f"![figure {i}](/images/figure-{i}.png) or `code {i}`."
+        for i in range(links)
+    )
+
+
+def bench(function, text: str, repeat: int = 5):
+    number = max(1, 20000 // len(text))
+    timings = timeit.repeat(lambda: function(text), number=number, repeat=repeat)
+    return min(timings) / number
+
+
+def main():
+    corpora = (("links", link_heavy_paragraph), ("mixed", mixed_paragraph))
+
+    print(f"{'corpus':>8} {'links':>6} {'split_nodes_*':>15} {'scanner':>12} {'':>8}")
+    for name, paragraph in corpora:
+        for links in (1, 10, 100, 1000, 5000, 20000):
+            text = paragraph(links)
+            assert text_to_text_nodes(text) == split_nodes_pipeline(text)
+
+            pipeline = bench(split_nodes_pipeline, text)
+            scanner = bench(text_to_text_nodes, text)
+            print(
+                f"{name:>8} {links:>6} {pipeline * 1000:>12.3f} ms"
+                f" {scanner * 1000:>9.3f} ms {pipeline / scanner:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import block
+import feeds
+import html_node
+import inline_markdown
+import text_node
+from block import markdown_to_html_node
+from corpus import page_markdown, write_corpus
+from main import build
+
+
+# The node classes as they were before __slots__, kept as the baseline
+class LegacyTextNode:
+    def __init__(self, text: str, text_type, url: str = None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class LegacyHTMLNode:
+    def __init__(
+        self,
+        tag: str = None,
+        value: str = None,
+        children: list = None,
+        props: dict = None,
+    ):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class LegacyLeafNode(LegacyHTMLNode):
+    def __init__(self, value: str, tag: str = None, props: dict = None):
+        super().__init__(tag=tag, value=value, children=None, props=props)
+
+
+class LegacyParentNode(LegacyHTMLNode):
+    def __init__(self, tag: str, children: list, props: dict = None):
+        super().__init__(tag=tag, value=None, children=children, props=props)
+
+
+@contextlib.contextmanager
+def legacy_nodes():
+    # Swap the classes where the tree builders look them up, and where
+    # iter_html checks node types, so pages render the same either way
+    patches = [
+        (block, "LeafNode", LegacyLeafNode),
+        (block, "ParentNode", LegacyParentNode),
+        (feeds, "LeafNode", LegacyLeafNode),
+        (feeds, "ParentNode", LegacyParentNode),
+        (html_node, "LeafNode", LegacyLeafNode),
+        (html_node, "ParentNode", LegacyParentNode),
+        (text_node, "LeafNode", LegacyLeafNode),
+        (inline_markdown, "TextNode", LegacyTextNode),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, cls in patches:
+        setattr(module, name, cls)
+    try:
+        yield
+    finally:
+        for module, name, cls in saved:
+            setattr(module, name, cls)
+
+
+VARIANTS = {"__dict__": legacy_nodes, "__slots__": contextlib.nullcontext}
+
+
+def measure_tree(markdown: str):
+    # Live blocks held by the finished tree, and the time to build it
+    before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    node = markdown_to_html_node(markdown)
+    elapsed = time.perf_counter() - start
+    blocks = sys.getallocatedblocks() - before
+    del node
+    return blocks, elapsed
+
+
+def timed_build(root: str, variant: str):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        build(
+            content_dir=f"{root}/content",
+            static_dir=f"{root}/static",
+            template_path=f"{root}/template.html",
+            dest_dir=f"{root}/docs{variant}",
+            manifest_path=f"{root}/.cache{variant}/manifest.json",
+        )
+        return time.perf_counter() - start
+
+
+def run_variant(root: str, variant: str, repeat: int):
+    # Runs in its own process, so peak RSS belongs to this variant alone; it
+    # is read before tracemalloc and the large page add their own memory
+    with VARIANTS[variant]():
+        build_time = timed_build(root, variant)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        tracemalloc.start()
+        timed_build(root, variant)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        rng = random.Random("bench_nodes")
+        big_page = page_markdown(rng, paragraphs=400, links=2, items=20)
+        runs = [measure_tree(big_page) for _ in range(repeat)]
+
+    return {
+        "blocks": min(blocks for blocks, _ in runs),
+        "tree_time": min(elapsed for _, elapsed in runs),
+        "page_size": len(big_page),
+        "build_time": build_time,
+        "traced_peak": peak,
+        "max_rss": max_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure node memory and build time")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    # Used by the benchmark to run each variant in a fresh process
+    parser.add_argument("--variant", choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.root, args.variant, args.repeat)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        write_corpus(root, "small", scale=args.pages / 1000)
+        for variant in VARIANTS:
+            command = [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--variant",
+                variant,
+                "--root",
+                root,
+                "--repeat",
+                str(args.repeat),
+            ]
+            output = subprocess.run(command, check=True, capture_output=True)
+            results[variant] = json.loads(output.stdout)
+
+    page_size = results["__slots__"]["page_size"]
+    print(f"one page ({page_size / 1024:.0f} KB), site of {args.pages} pages:")
+    print(
+        f"{'':>10} {'live blocks':>12} {'tree time':>12} {'build time':>12}"
+        f" {'traced peak':>12} {'peak RSS':>12}"
+    )
+    for variant, result in results.items():
+        print(
+            f"{variant:>10} {result['blocks']:>12}"
+            f" {result['tree_time'] * 1000:>9.1f} ms"
+            f" {result['build_time']:>10.2f} s"
+            f" {result['traced_peak'] / 2**20:>9.2f} MB"
+            f" {result['max_rss'] / 1024:>9.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
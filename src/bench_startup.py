@@ -0,0 +1,98 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+CLI = os.path.join(SRC_DIR, "cli.py")
+TARGET_MS = 50
+IMPORT_MAIN = f"import sys; sys.path.insert(0, {SRC_DIR!r}); import main"
+
+
+def run(command: list, cwd: str):
+    subprocess.run(command, cwd=cwd, check=True, capture_output=True)
+
+
+def wall_times(command: list, cwd: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(command, cwd)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def import_times(command: list, cwd: str):
+    # -X importtime writes "self | cumulative | module" lines to stderr,
+    # indented by nesting; only modules imported at the top level are kept
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time interpreter startup and imports of the CLI subcommands"
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--page", default="content/index.md")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as site:
+        shutil.copytree(f"{ROOT_DIR}/content", f"{site}/content")
+        shutil.copytree(f"{ROOT_DIR}/static", f"{site}/static")
+        shutil.copy(f"{ROOT_DIR}/template.html", site)
+        # render-one reads the manifest of an earlier build
+        run([sys.executable, CLI, "build"], site)
+
+        render_one = [CLI, "render-one", args.page]
+        commands = (
+            ("python -c pass", ["-c", "pass"]),
+            # Everything a build imports, as main.py did for every command
+            ("import main", ["-c", IMPORT_MAIN]),
+            ("render-one", render_one),
+        )
+        print(f"{'':>16} {'min':>9} {'median':>9}")
+        results = {}
+        for name, command in commands:
+            timings = wall_times([sys.executable, *command], site, args.repeat)
+            # The median is checked: a typical run, not the luckiest one
+            results[name] = statistics.median(timings)
+            print(
+                f"{name:>16} {min(timings):>6.1f} ms "
+                f"{statistics.median(timings):>6.1f} ms"
+            )
+
+        print("\nSlowest imports of render-one (cumulative):")
+        for cumulative, name in import_times(render_one, site)[: args.top]:
+            print(f"{name:>16} {cumulative:>6.1f} ms")
+
+    overhead = results["render-one"] - results["python -c pass"]
+    print(
+        f"\nrender-one: {results['render-one']:.1f} ms end to end (median), "
+        f"{overhead:.1f} ms over a bare interpreter (target {TARGET_MS} ms)"
+    )
+    if results["render-one"] > TARGET_MS:
+        sys.exit(f"render-one missed the {TARGET_MS} ms target")
+
+
+if __name__ == "__main__":
+    main()
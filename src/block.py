@@ -1,9 +1,20 @@
+import io
 import re
 from enum import Enum
 
 from inline_markdown import text_to_text_nodes
 from text_node import text_node_to_html_node
-from html_node import ParentNode, LeafNode
+from html_node import ParentNode, LeafNode, RawNode
+
+BLOCK_SEPARATOR_PATTERN = re.compile(r"\n\s*\n")
+HEADING_PATTERN = re.compile(r"^#{1,6}\s")
+HEADING_CONTENT_PATTERN = re.compile(r"^(#+)\s+(.*)")
+TITLE_PATTERN = re.compile(r"^#\s+(.*?)\s*$", re.IGNORECASE)
+UNORDERED_ITEM_PATTERN = re.compile(r"^[*\-]\s")
+ORDERED_ITEM_PATTERN = re.compile(r"^(\d+)\.\s")
+LIST_ITEM_PATTERN = re.compile(r"^[*\-]\s+|\d+\.\s+")
+# Paragraphs of nothing but links or images, like a "Back home" link
+LINKS_ONLY_PATTERN = re.compile(r"^(?:\s*!?\[[^\]]*\]\([^)]*\))+\s*$")
 
 
 class BlockType(Enum):
@@ -16,117 +27,293 @@ class BlockType(Enum):
 
 
 def markdown_to_blocks(markdown: str):
-    blocks = re.split(r"\n\s*\n", markdown)
+    blocks = BLOCK_SEPARATOR_PATTERN.split(markdown)
     return [block for block in blocks if block.strip()]
 
 
-def block_to_block_type(block: str):
-    lines = block.split("\n")
+def markdown_to_lines(markdown: str):
+    # Only "\n" ends a line, exactly like the blank-line separator pattern
+    return io.StringIO(markdown, newline="\n")
 
-    if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
 
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
+def iter_blocks(lines):
+    # Streaming equivalent of markdown_to_blocks over an iterable of lines
+    # (e.g. an open file). Each block is yielded as its list of lines without
+    # line endings, so "\n".join(block_lines) is the block markdown_to_blocks
+    # would return. A whitespace-only line is a separator when a newline both
+    # precedes and ends it; the newline ending the previous line belongs to
+    # the separator, the one ending the last line of the input does not.
+    block_lines = []
+    after_newline = False
+    ends_with_newline = False
 
-    if len(lines) > 0:
-        # Unordered List
-        if all(re.match(r"^[*\-]\s", line) for line in lines):
-            return BlockType.UNORDERED_LIST
-
-        # Ordered List (check sequential numbering)
-        ordered = True
-        for i, line in enumerate(lines):
-            if not re.match(rf"^{i+1}\.\s", line):
-                ordered = False
-                break
-        if ordered:
-            return BlockType.ORDERED_LIST
+    for raw_line in lines:
+        ends_with_newline = raw_line.endswith("\n")
+        line = raw_line[:-1] if ends_with_newline else raw_line
 
-    if re.match(r"^#{1,6}\s", block):
-        return BlockType.HEADING
-
-    return BlockType.PARAGRAPH
-
-
-def text_to_children(text: str):
-    text_nodes = text_to_text_nodes(text)
-    return [text_node_to_html_node(node) for node in text_nodes if node]
+        if after_newline and ends_with_newline and not line.strip():
+            if any(block_line.strip() for block_line in block_lines):
+                yield block_lines
+            block_lines = []
+        else:
+            block_lines.append(line)
 
+        after_newline = ends_with_newline
 
-def parent_tag(block_type: BlockType):
-    return {
-        BlockType.PARAGRAPH: "p",
-        BlockType.HEADING: "h",
-        BlockType.CODE: "pre",
-        BlockType.QUOTE: "blockquote",
-        BlockType.UNORDERED_LIST: "ul",
-        BlockType.ORDERED_LIST: "ol",
-    }.get(block_type, "div")
+    if block_lines and ends_with_newline:
+        block_lines.append("")
+    if any(block_line.strip() for block_line in block_lines):
+        yield block_lines
 
 
-def markdown_to_html_node(markdown: str):
-    blocks = markdown_to_blocks(markdown=markdown)
-    html_nodes = []
+def block_to_block_type(block: str):
+    return lines_to_block_type(block.split("\n"), block)
 
-    for block in blocks:
-        block_type = block_to_block_type(block=block)
-        tag = parent_tag(block_type=block_type)
 
-        if block_type == BlockType.HEADING:
-            match = re.match(r"^(#+)\s+(.*)", block)
-            if not match:
-                raise ValueError(f"Invalid heading format: {block}")
-            level = len(match.group(1))
-            content = match.group(2)
-            tag = f"h{level}"
-
-            html_nodes.append(ParentNode(tag, text_to_children(content)))
-
-        elif block_type == BlockType.CODE:
-            code_content = block.strip("```").split("\n", 1)[-1].strip()
-            code_node = LeafNode(tag="code", value=code_content)
-            html_nodes.append(ParentNode("pre", [code_node]))
-
-        elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
-            items = []
-            for line in block.split("\n"):
-                parts = re.split(r"^[*\-]\s+|\d+\.\s+", line, 1)
-                content = parts[1] if len(parts) > 1 else ""
-                children = text_to_children(content)
-                items.append(ParentNode("li", children))
-            tag = "ul" if block_type == BlockType.UNORDERED_LIST else "ol"
-            html_nodes.append(ParentNode(tag, items))
-
-        elif block_type == BlockType.QUOTE:
-            lines = [line.lstrip("> ").strip() for line in block.split("\n")]
-            quote_content = " ".join(lines)
-            children = text_to_children(quote_content)
-            html_nodes.append(ParentNode("blockquote", children))
+def lines_to_block_type(lines: list, block: str):
+    if block.startswith("```") and block.endswith("```"):
+        return BlockType.CODE
 
-        else:
-            children = text_to_children(block)
-            html_nodes.append(ParentNode("p", children))
+    # Quote and list checks share a single pass over the lines
+    quote = unordered = ordered = True
+    for i, line in enumerate(lines):
+        quote = quote and line.startswith(">")
+        unordered = unordered and UNORDERED_ITEM_PATTERN.match(line) is not None
+        if ordered:
+            match = ORDERED_ITEM_PATTERN.match(line)
+            ordered = match is not None and match.group(1) == str(i + 1)
+        if not (quote or unordered or ordered):
+            break
 
-    return ParentNode(tag="div", children=html_nodes)
+    if quote:
+        return BlockType.QUOTE
+    if unordered:
+        return BlockType.UNORDERED_LIST
+    if ordered:
+        return BlockType.ORDERED_LIST
 
+    if HEADING_PATTERN.match(block):
+        return BlockType.HEADING
 
-def extract_title(markdown):
-    blocks = markdown_to_blocks(markdown=markdown)
-    h1_headings = []
+    return BlockType.PARAGRAPH
 
-    for block in blocks:
-        block_type = block_to_block_type(block=block)
-        if block_type != BlockType.HEADING:
-            continue
 
-        match = re.match(r"^#\s+(.*?)\s*$", block, re.IGNORECASE)
-        if match:
-            h1_headings.append(match.group(1).strip())
+def text_to_children(
+    text: str, basepath: str = "/", links: list = None, images: dict = None
+):
+    text_nodes = text_to_text_nodes(text)
+    if links is not None:
+        # Only link and image nodes carry a URL
+        links.extend(node.url for node in text_nodes if node.url is not None)
+    return [
+        text_node_to_html_node(node, basepath, images) for node in text_nodes if node
+    ]
+
+
+def heading_to_html_node(
+    lines: list, block: str, basepath: str, links: list, images: dict
+):
+    match = HEADING_CONTENT_PATTERN.match(block)
+    if not match:
+        raise ValueError(f"Invalid heading format: {block}")
+    level = len(match.group(1))
+    content = match.group(2)
+    return ParentNode(f"h{level}", text_to_children(content, basepath, links, images))
+
+
+def code_to_html_node(
+    lines: list, block: str, basepath: str, links: list, images: dict
+):
+    code_content = block.strip("```").split("\n", 1)[-1].strip()
+    code_node = LeafNode(tag="code", value=code_content)
+    return ParentNode("pre", [code_node])
+
+
+def list_items(lines: list, basepath: str, links: list, images: dict):
+    items = []
+    for line in lines:
+        # Classification guarantees every line starts with an item marker
+        match = LIST_ITEM_PATTERN.match(line)
+        content = line[match.end() :] if match else ""
+        children = text_to_children(content, basepath, links, images)
+        items.append(ParentNode("li", children))
+    return items
+
+
+def unordered_list_to_html_node(
+    lines: list, block: str, basepath: str, links: list, images: dict
+):
+    return ParentNode("ul", list_items(lines, basepath, links, images))
+
+
+def ordered_list_to_html_node(
+    lines: list, block: str, basepath: str, links: list, images: dict
+):
+    return ParentNode("ol", list_items(lines, basepath, links, images))
+
+
+def quote_to_html_node(
+    lines: list, block: str, basepath: str, links: list, images: dict
+):
+    quote_content = " ".join(line.lstrip("> ").strip() for line in lines)
+    children = text_to_children(quote_content, basepath, links, images)
+    return ParentNode("blockquote", children)
+
+
+def paragraph_to_html_node(
+    lines: list, block: str, basepath: str, links: list, images: dict
+):
+    return ParentNode("p", text_to_children(block, basepath, links, images))
+
+
+BLOCK_BUILDERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+}
+
+
+def block_to_html_node(
+    lines: list,
+    block: str,
+    block_type: BlockType,
+    basepath="/",
+    links: list = None,
+    images: dict = None,
+):
+    builder = BLOCK_BUILDERS.get(block_type, paragraph_to_html_node)
+    return builder(lines, block, basepath, links, images)
+
+
+def block_node(
+    lines: list,
+    block: str,
+    basepath="/",
+    cache=None,
+    block_type: BlockType = None,
+    links: list = None,
+    images: dict = None,
+):
+    # Image attributes come from the image registry, not just the block text
+    if cache is not None and "![" in block:
+        cache = None
+    if cache is not None:
+        entry = cache.lookup(block, basepath)
+        if entry is not None:
+            fragment, block_links = entry
+            if links is not None:
+                links.extend(block_links)
+            return RawNode(fragment)
+
+    if block_type is None:
+        block_type = lines_to_block_type(lines, block)
+    # Links are cached with the fragment so that hits still report them
+    block_links = [] if cache is not None else links
+    node = block_to_html_node(lines, block, block_type, basepath, block_links, images)
+    if cache is not None:
+        # The fragment is rendered once, for both the cache and the page
+        fragment = node.to_html()
+        cache.put(block, basepath, fragment, block_links)
+        if links is not None:
+            links.extend(block_links)
+        return RawNode(fragment)
+    return node
+
+
+def iter_block_nodes(lines, basepath: str = "/", cache=None, images: dict = None):
+    for block_lines in iter_blocks(lines):
+        block = "\n".join(block_lines)
+        yield block_node(block_lines, block, basepath, cache, images=images)
+
+
+def lines_to_html_node(lines, basepath: str = "/", cache=None, images: dict = None):
+    children = list(iter_block_nodes(lines, basepath, cache, images))
+    return ParentNode(tag="div", children=children)
+
+
+def markdown_to_html_node(
+    markdown: str, basepath: str = "/", cache=None, images: dict = None
+):
+    return lines_to_html_node(markdown_to_lines(markdown), basepath, cache, images)
+
+
+class Document:
+    def __init__(self):
+        self.children = []
+        # (level, text) for every heading in order, text as written
+        self.headings = []
+        self.h1_headings = []
+        self.first_paragraph = None
+        # Link and image targets as written in the source, in order
+        self.links = []
+
+    def add_metadata(self, block: str, block_type: BlockType):
+        if block_type == BlockType.HEADING:
+            match = HEADING_CONTENT_PATTERN.match(block)
+            if match:
+                self.headings.append((len(match.group(1)), match.group(2)))
+            match = TITLE_PATTERN.match(block)
+            if match:
+                self.h1_headings.append(match.group(1).strip())
+        elif block_type == BlockType.PARAGRAPH and self.first_paragraph is None:
+            # The summary should be prose, not navigation
+            if not LINKS_ONLY_PATTERN.match(block):
+                self.first_paragraph = block
+
+    @property
+    def node(self):
+        return ParentNode(tag="div", children=self.children)
+
+    @property
+    def title(self):
+        if len(self.h1_headings) == 0:
+            raise ValueError("No H1 heading found in markdown")
+        if len(self.h1_headings) > 1:
+            raise ValueError(f"Multiple H1 headings found: {self.h1_headings}")
+
+        return self.h1_headings[0]
+
+    @property
+    def summary(self):
+        if self.first_paragraph is None:
+            return ""
+        text = "".join(node.text for node in text_to_text_nodes(self.first_paragraph))
+        return " ".join(text.split())
+
+
+def iter_document_nodes(
+    lines, document: Document, basepath="/", cache=None, images: dict = None
+):
+    # One pass that both renders the blocks and collects the page metadata;
+    # the nodes are yielded rather than kept so callers can stream them
+    for block_lines in iter_blocks(lines):
+        block = "\n".join(block_lines)
+        block_type = lines_to_block_type(block_lines, block)
+        document.add_metadata(block, block_type)
+        yield block_node(
+            block_lines, block, basepath, cache, block_type, document.links, images
+        )
+
+
+def analyze_lines(lines, basepath: str = "/", cache=None, images: dict = None):
+    document = Document()
+    nodes = iter_document_nodes(lines, document, basepath, cache, images)
+    document.children.extend(nodes)
+    return document
+
+
+def analyze_markdown(
+    markdown: str, basepath: str = "/", cache=None, images: dict = None
+):
+    return analyze_lines(markdown_to_lines(markdown), basepath, cache, images)
 
-    if len(h1_headings) == 0:
-        raise ValueError("No H1 heading found in markdown")
-    if len(h1_headings) > 1:
-        raise ValueError(f"Multiple H1 headings found: {h1_headings}")
 
-    return h1_headings[0]
+def extract_title(markdown):
+    document = Document()
+    for block_lines in iter_blocks(markdown_to_lines(markdown)):
+        block = "\n".join(block_lines)
+        document.add_metadata(block, lines_to_block_type(block_lines, block))
+    return document.title
@@ -0,0 +1,352 @@
+import os
+import sys
+from types import SimpleNamespace
+
+# Every subcommand imports what it needs when it runs: render-one and the dev
+# server are started often enough that loading the whole build pipeline,
+# asyncio and the process pools up front would be most of their run time.
+# Even argparse is only imported when a parser is built.
+
+# Options of render-one that take a value, with their defaults
+RENDER_ONE_OPTIONS = {
+    "--dest": None,
+    "--content-dir": "./content",
+    "--dest-dir": "./docs",
+    "--template": "./template.html",
+    "--manifest": "./.cache/manifest.json",
+}
+
+
+def parse_shard(value: str):
+    import argparse
+
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} is not in 1..{count}")
+    return index, count
+
+
+def main(argv: list = None):
+    argv = sys.argv[1:] if argv is None else argv
+    # "main.py BASEPATH --flags", from before the subcommands, still builds
+    if (
+        not argv
+        or argv[0].startswith("/")
+        or (argv[0].startswith("-") and argv[0] not in ("-h", "--help"))
+    ):
+        argv = ["build", *argv]
+    args = parse_render_one(argv[1:]) if argv[0] == "render-one" else None
+    if args is None:
+        args = create_parser(argv[0]).parse_args(argv)
+    args.run(args)
+
+
+def parse_render_one(argv: list):
+    # render-one runs from editor hooks on every save, and argparse with what
+    # it imports is a large share of its startup. Plain invocations are read
+    # here; anything else (--help, abbreviations, mistakes) returns None and
+    # is left to argparse, which reports errors the usual way.
+    options = dict(RENDER_ONE_OPTIONS, **{"--minify-html": False})
+    positional = []
+    arguments = iter(argv)
+    for argument in arguments:
+        name, equals, value = argument.partition("=")
+        if argument == "--minify-html":
+            options[argument] = True
+        elif name in RENDER_ONE_OPTIONS:
+            value = value if equals else next(arguments, None)
+            if value is None or (not equals and value.startswith("-")):
+                return None
+            options[name] = value
+        elif argument.startswith("-") or len(positional) == 2:
+            return None
+        else:
+            positional.append(argument)
+    if not positional:
+        return None
+
+    return SimpleNamespace(
+        run=run_render_one,
+        source=positional[0],
+        basepath=positional[1] if len(positional) > 1 else "/",
+        **{name[2:].replace("-", "_"): value for name, value in options.items()},
+    )
+
+
+def create_parser(command: str = None):
+    import argparse
+
+    # Only the arguments of the command being run are added: argparse formats
+    # every argument as it is added, which costs a few ms
+    parser = argparse.ArgumentParser(description="Static site generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (summary, add_arguments) in COMMANDS.items():
+        subparser = commands.add_parser(name, help=summary)
+        if command is None or command == name:
+            add_arguments(subparser)
+    return parser
+
+
+def add_build_arguments(build: "argparse.ArgumentParser"):
+    build.set_defaults(run=run_build)
+    build.add_argument("basepath", nargs="?", default="/")
+    build.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-render pages whose source or template changed",
+    )
+    build.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages",
+    )
+    build.add_argument(
+        "--async-io",
+        nargs="?",
+        type=int,
+        const=8,
+        default=0,
+        metavar="DEPTH",
+        help="overlap source reads and output writes with rendering, keeping up "
+        "to DEPTH of each in flight",
+    )
+    build.add_argument(
+        "--block-cache",
+        type=int,
+        default=0,
+        metavar="SIZE",
+        help="cache up to SIZE rendered blocks in memory (per worker)",
+    )
+    build.add_argument(
+        "--block-cache-dir",
+        help="also keep rendered blocks on disk in this directory",
+    )
+    build.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content when size matches but mtime differs",
+    )
+    build.add_argument(
+        "--link",
+        action="store_true",
+        help="hardlink static files into the output instead of copying them",
+    )
+    build.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="render only shard I of N of the pages into --shard-dir",
+    )
+    build.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="assemble the shards in --shard-dir into the output directory",
+    )
+    build.add_argument("--shard-dir", default="./.cache/shards")
+    build.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed .gz (and .br, with brotli installed) siblings "
+        "of text outputs",
+    )
+    build.add_argument(
+        "--minify-html",
+        action="store_true",
+        help="collapse insignificant whitespace in the generated HTML",
+    )
+    build.add_argument(
+        "--site-url",
+        help="absolute URL of the site, e.g. https://example.com; enables "
+        "sitemap.xml and the Atom feed",
+    )
+    build.add_argument(
+        "--feed-author",
+        help="author name in the Atom feed; defaults to the feed title",
+    )
+    build.add_argument(
+        "--blog-dir",
+        default="blog",
+        help="output directory whose pages are listed as blog posts",
+    )
+    build.add_argument("--posts-per-page", type=int, default=10)
+    build.add_argument(
+        "--profile",
+        nargs="?",
+        const="./.cache/profile.json",
+        metavar="REPORT",
+        help="time every build stage per page (serially, without the block "
+        "cache) and write a JSON report",
+    )
+    build.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages listed after a profiled build",
+    )
+
+
+def add_render_one_arguments(render_one: "argparse.ArgumentParser"):
+    render_one.set_defaults(run=run_render_one)
+    render_one.add_argument("source", help="markdown file under --content-dir")
+    render_one.add_argument("basepath", nargs="?", default="/")
+    render_one.add_argument(
+        "--dest", help="output path; by default mirrors the build's layout"
+    )
+    render_one.add_argument(
+        "--content-dir", default=RENDER_ONE_OPTIONS["--content-dir"]
+    )
+    render_one.add_argument("--dest-dir", default=RENDER_ONE_OPTIONS["--dest-dir"])
+    render_one.add_argument("--template", default=RENDER_ONE_OPTIONS["--template"])
+    render_one.add_argument(
+        "--manifest",
+        default=RENDER_ONE_OPTIONS["--manifest"],
+        help="build manifest whose image sizes and asset URLs are used",
+    )
+    render_one.add_argument("--minify-html", action="store_true")
+
+
+def add_serve_arguments(serve: "argparse.ArgumentParser"):
+    serve.set_defaults(run=run_serve)
+    serve.add_argument("--port", type=int, default=8888)
+    serve.add_argument("--directory", default="./docs")
+
+
+def add_watch_arguments(watch: "argparse.ArgumentParser"):
+    watch.set_defaults(run=run_watch)
+    watch.add_argument("basepath", nargs="?", default="/")
+    watch.add_argument("--port", type=int, default=8888)
+    watch.add_argument(
+        "--poll", action="store_true", help="poll for changes instead of inotify"
+    )
+
+
+def run_build(args: "argparse.Namespace"):
+    from main import build, report_broken_links
+    from profiler import Profiler
+    from render_cache import BlockCache
+    from shard import merge_shards
+
+    cache = None
+    if args.block_cache or args.block_cache_dir:
+        cache = BlockCache(args.block_cache or 4096, directory=args.block_cache_dir)
+
+    profiler = Profiler() if args.profile else None
+
+    if args.merge_shards:
+        manifest = merge_shards(
+            args.shard_dir,
+            basepath=args.basepath,
+            checksum=args.checksum,
+            link=args.link,
+            minify_html=args.minify_html,
+            compress=args.compress,
+            site_url=args.site_url,
+            blog_dir=args.blog_dir,
+            posts_per_page=args.posts_per_page,
+            feed_author=args.feed_author,
+        )
+        static_files = manifest["static"] + list(manifest["generated"])
+        report_broken_links(manifest["pages"], static_files, "./docs")
+        return
+
+    print(args.basepath)
+    build(
+        basepath=args.basepath,
+        incremental=args.incremental,
+        jobs=args.jobs,
+        io_depth=args.async_io,
+        cache=cache,
+        checksum=args.checksum,
+        link=args.link,
+        profiler=profiler,
+        shard=args.shard,
+        shard_dir=args.shard_dir,
+        minify_html=args.minify_html,
+        compress=args.compress,
+        site_url=args.site_url,
+        blog_dir=args.blog_dir,
+        posts_per_page=args.posts_per_page,
+        feed_author=args.feed_author,
+    )
+
+    if profiler is not None:
+        profiler.save(args.profile)
+        print(profiler.summary(top=args.profile_top))
+        print(f"Profile written to {args.profile}")
+
+
+def run_render_one(args: "argparse.Namespace"):
+    from manifest import load_manifest
+    from render import render_page
+    from template import asset_urls, load_template
+    from text_node import image_registry
+
+    dest = args.dest
+    if dest is None:
+        relative = os.path.relpath(args.source, args.content_dir)
+        if relative.startswith(os.pardir):
+            raise SystemExit(f"{args.source} is not under {args.content_dir}")
+        dest = os.path.join(args.dest_dir, os.path.splitext(relative)[0] + ".html")
+
+    # The last build's image sizes and fingerprinted assets, so the page comes
+    # out as a full build would render it
+    manifest = load_manifest(args.manifest)
+    images = image_registry(manifest.get("images", {}))
+    assets = asset_urls(manifest.get("assets", {}), args.basepath)
+    template = load_template(args.template, args.basepath, assets, args.minify_html)
+    previous = manifest["pages"].get(os.path.normpath(args.source), {})
+
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    _, _, written = render_page(
+        args.source,
+        template,
+        dest,
+        args.basepath,
+        None,
+        previous.get("output"),
+        images,
+    )
+    print(f"Rendered {args.source} to {dest}" if written else f"{dest} is unchanged")
+
+
+def run_serve(args: "argparse.Namespace"):
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = partial(SimpleHTTPRequestHandler, directory=args.directory)
+    with ThreadingHTTPServer(("", args.port), handler) as server:
+        print(f"Serving {args.directory} on port {args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def run_watch(args: "argparse.Namespace"):
+    import watch
+
+    watch.main(args.basepath, args.port, args.poll)
+
+
+COMMANDS = {
+    "build": ("build the whole site", add_build_arguments),
+    "render-one": (
+        "render a single page, e.g. from an editor hook",
+        add_render_one_arguments,
+    ),
+    "serve": ("serve the built site", add_serve_arguments),
+    "watch": (
+        "serve the site, rebuilding and reloading on changes",
+        add_watch_arguments,
+    ),
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_bytes
+from static_sync import remove_output
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".json", ".svg", ".txt", ".xml"}
+
+
+def load_brotli():
+    # brotli is optional; without it only .gz siblings are written
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compressors():
+    # Sibling suffix -> function compressing bytes
+    formats = {
+        # mtime=0 keeps the output identical for identical input
+        "gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    brotli = load_brotli()
+    if brotli is not None:
+        formats["br"] = lambda data: brotli.compress(data, quality=11)
+    return formats
+
+
+def is_compressible(file: str):
+    return os.path.splitext(file)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def write_sibling(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def compress_file(path: str, previous: dict, formats: dict):
+    # Returns the file's record and whether it had to be compressed. A
+    # sibling is only kept when it is smaller than the file itself.
+    stat = os.stat(path)
+    siblings_exist = previous is not None and all(
+        os.path.exists(f"{path}.{suffix}") for suffix in previous["saved"]
+    )
+    if (
+        previous is not None
+        and previous["formats"] == sorted(formats)
+        and previous["size"] == stat.st_size
+        and previous["mtime"] == stat.st_mtime_ns
+        and siblings_exist
+    ):
+        return previous, False
+
+    with open(path, "rb") as file:
+        data = file.read()
+    digest = hash_bytes(data)
+    record = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "hash": digest,
+        "formats": sorted(formats),
+        "saved": {},
+    }
+    if (
+        previous is not None
+        and previous["formats"] == record["formats"]
+        and previous["hash"] == digest
+        and siblings_exist
+    ):
+        # Rewritten with the same content, e.g. a fresh static copy
+        record["saved"] = previous["saved"]
+        return record, False
+
+    for suffix, compress in formats.items():
+        compressed = compress(data)
+        sibling = f"{path}.{suffix}"
+        if len(compressed) < len(data):
+            write_sibling(sibling, compressed)
+            record["saved"][suffix] = len(data) - len(compressed)
+        elif os.path.exists(sibling):
+            os.remove(sibling)
+    return record, True
+
+
+def sibling_paths(records: dict):
+    return [
+        f"{file}.{suffix}"
+        for file, record in records.items()
+        for suffix in record["saved"]
+    ]
+
+
+def compress_outputs(dest_dir: str, files, previous: dict = None, enabled: bool = True):
+    # Writes .gz (and, with brotli installed, .br) siblings of the text files
+    # among files, given relative to dest_dir. Files unchanged since the last
+    # build are skipped. Siblings of files that are gone, or of every file
+    # when disabled, are removed. Returns the records by file and the counts.
+    previous = previous or {}
+    formats = compressors() if enabled else {}
+    files = sorted(file for file in files if is_compressible(file)) if enabled else []
+
+    def compress(file: str):
+        path = os.path.join(dest_dir, file)
+        return compress_file(path, previous.get(file), formats)
+
+    # zlib and brotli release the GIL while compressing, so threads run the
+    # files in parallel
+    with ThreadPoolExecutor() as executor:
+        results = list(executor.map(compress, files))
+
+    records = {}
+    counts = {"compressed": 0, "unchanged": 0, "saved": dict.fromkeys(formats, 0)}
+    for file, (record, compressed) in zip(files, results):
+        records[file] = record
+        counts["compressed" if compressed else "unchanged"] += 1
+        for suffix, saved in record["saved"].items():
+            counts["saved"][suffix] += saved
+
+    current = set(sibling_paths(records))
+    for sibling in sibling_paths(previous):
+        path = os.path.join(dest_dir, sibling)
+        if sibling not in current and os.path.exists(path):
+            remove_output(path, dest_dir)
+
+    return records, counts
+
+
+def format_compress_counts(counts: dict):
+    saved = ", ".join(
+        f"{saved / 1024:.1f} KiB saved by .{suffix}"
+        for suffix, saved in counts["saved"].items()
+    )
+    return (
+        f"Compressed: {counts['compressed']} compressed, "
+        f"{counts['unchanged']} unchanged ({saved})"
+    )
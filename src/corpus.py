@@ -0,0 +1,110 @@
+import argparse
+import os
+import random
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "while elves and dwarves and men of the west kept watch over middle earth"
+).split()
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+# name: (pages, paragraphs, links per paragraph, list items, directory depth)
+CORPORA = {
+    "small": (1000, 2, 1, 3, 1),
+    "huge": (3, 4000, 2, 20, 1),
+    "links": (200, 20, 40, 0, 1),
+    "lists": (200, 2, 1, 400, 1),
+    "nested": (500, 3, 2, 5, 12),
+}
+
+
+def sentence(rng: random.Random, words: int = 12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def paragraph(rng: random.Random, links: int):
+    parts = [sentence(rng).capitalize()]
+    for i in range(links):
+        link = f"[{sentence(rng, 2)}](/blog/{rng.randrange(1000)})"
+        parts.append(f"{sentence(rng, 4)} **{sentence(rng, 2)}** {link}")
+        if i % 5 == 4:
+            parts.append(f"*{sentence(rng, 3)}* and `{sentence(rng, 1)}`")
+    return " ".join(parts) + "."
+
+
+def page_markdown(rng: random.Random, paragraphs: int, links: int, items: int):
+    blocks = [f"# {sentence(rng, 5).title()}"]
+    for i in range(paragraphs):
+        if i % 10 == 5:
+            blocks.append(f"## {sentence(rng, 4).title()}")
+        if i % 10 == 7:
+            blocks.append(f"> {sentence(rng)}\n> {sentence(rng)}")
+        if i % 10 == 9:
+            blocks.append(f"```\n{sentence(rng)}\n{sentence(rng)}\n```")
+        blocks.append(paragraph(rng, links))
+    if items:
+        blocks.append("\n".join(f"- {paragraph(rng, 1)}" for _ in range(items)))
+        blocks.append("\n".join(f"{i + 1}. {sentence(rng, 6)}" for i in range(items)))
+        # A trailing newline stays in the last block, so end on a paragraph
+        # to keep the ordered list a list
+        blocks.append(paragraph(rng, links))
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_directory(index: int, depth: int):
+    parts = [f"section{(index >> level) % 4}" for level in range(depth - 1)]
+    return os.path.join(*parts, f"page{index}") if parts else f"page{index}"
+
+
+def write_corpus(root: str, name: str, scale: float = 1.0, seed: int = 0):
+    pages, paragraphs, links, items, depth = CORPORA[name]
+    if name == "huge":
+        paragraphs = max(1, int(paragraphs * scale))
+    else:
+        pages = max(1, int(pages * scale))
+    rng = random.Random(f"{name}:{seed}")
+
+    os.makedirs(f"{root}/static", exist_ok=True)
+    with open(f"{root}/static/index.css", "w") as file:
+        file.write("body { margin: 0 auto; max-width: 40em; }\n")
+    with open(f"{root}/template.html", "w") as file:
+        file.write(TEMPLATE)
+
+    paths = []
+    for index in range(pages):
+        directory = os.path.join(root, "content", page_directory(index, depth))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "index.md")
+        with open(path, "w") as file:
+            file.write(page_markdown(rng, paragraphs, links, items))
+        paths.append(path)
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic site")
+    parser.add_argument("root")
+    parser.add_argument("corpus", choices=sorted(CORPORA))
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_corpus(args.root, args.corpus, scale=args.scale, seed=args.seed)
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"Wrote {len(paths)} pages ({size / 2**20:.1f} MB) to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
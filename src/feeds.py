@@ -0,0 +1,197 @@
+import os
+import time
+
+from html_node import LeafNode, ParentNode, escape_attribute, escape_text, iter_html
+from output import write_output
+from static_sync import remove_output
+from template import Template
+from urls import rewrite_url
+
+FEED_SIZE = 20
+SITEMAP_PATH = "sitemap.xml"
+FEED_PATH = "feed.xml"
+
+
+def path_url(path: str, basepath: str):
+    # URL of a file given by its path relative to the output directory
+    if path == "index.html" or path.endswith("/index.html"):
+        path = path[: -len("index.html")]
+    return rewrite_url(f"/{path}", basepath)
+
+
+def output_path(dest: str, dest_dir: str):
+    return os.path.relpath(dest, dest_dir).replace(os.sep, "/")
+
+
+def listing_path(blog_dir: str, number: int):
+    if number == 1:
+        return f"{blog_dir}/index.html"
+    return f"{blog_dir}/page/{number}/index.html"
+
+
+def blog_posts(pages: dict, dest_dir: str, basepath: str, blog_dir: str):
+    # Pages below blog_dir, newest first. Everything needed comes from the
+    # manifest entries, so no Markdown is read.
+    posts = []
+    for page in pages.values():
+        path = output_path(page["dest"], dest_dir)
+        if path.startswith(f"{blog_dir}/") and path != listing_path(blog_dir, 1):
+            posts.append(
+                {
+                    "title": page["title"],
+                    "summary": page["summary"],
+                    "mtime": page["mtime"],
+                    "url": path_url(path, basepath),
+                }
+            )
+    return sorted(posts, key=lambda post: (-post["mtime"], post["url"]))
+
+
+def listing_node(title: str, posts: list, newer: str, older: str):
+    items = []
+    for post in posts:
+        link = LeafNode(post["title"], "a", {"href": post["url"]})
+        children = [ParentNode("h2", [link])]
+        if post["summary"]:
+            children.append(LeafNode(post["summary"], "p"))
+        items.append(ParentNode("li", children))
+
+    children = [LeafNode(title, "h1"), ParentNode("ul", items)]
+    navigation = []
+    if newer:
+        navigation.append(LeafNode("Newer posts", "a", {"href": newer}))
+    if older:
+        navigation.append(LeafNode("Older posts", "a", {"href": older}))
+    if navigation:
+        children.append(ParentNode("nav", navigation))
+    return ParentNode("div", children)
+
+
+def render_listings(
+    posts: list,
+    template: Template,
+    basepath: str,
+    blog_dir: str,
+    title: str,
+    per_page: int,
+):
+    # Output path -> HTML of every listing page
+    count = max(1, -(-len(posts) // per_page))
+    listings = {}
+    for number in range(1, count + 1):
+        newer = older = None
+        if number > 1:
+            newer = path_url(listing_path(blog_dir, number - 1), basepath)
+        if number < count:
+            older = path_url(listing_path(blog_dir, number + 1), basepath)
+        page_posts = posts[(number - 1) * per_page : number * per_page]
+        node = listing_node(title, page_posts, newer, older)
+        content = template.process("".join(iter_html(node)))
+        chunks = template.iter_render(Title=escape_text(title), Content=content)
+        listings[listing_path(blog_dir, number)] = "".join(chunks)
+    return listings
+
+
+def render_sitemap(urls: list, lastmods: dict, site_url: str):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for url in urls:
+        lastmod = ""
+        if url in lastmods:
+            date = time.strftime("%Y-%m-%d", time.gmtime(lastmods[url]))
+            lastmod = f"<lastmod>{date}</lastmod>"
+        loc = escape_text(site_url + url)
+        lines.append(f"  <url><loc>{loc}</loc>{lastmod}</url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def atom_time(mtime: float):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(mtime))
+
+
+def render_feed(
+    posts: list, site_url: str, feed_url: str, title: str, author: str = None
+):
+    # Atom requires an author; one for the whole feed covers every entry
+    posts = posts[:FEED_SIZE]
+    updated = max((post["mtime"] for post in posts), default=0)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape_text(title)}</title>",
+        f'  <link rel="self" href="{escape_attribute(site_url + feed_url)}"/>',
+        f"  <id>{escape_text(site_url + feed_url)}</id>",
+        f"  <updated>{atom_time(updated)}</updated>",
+        f"  <author><name>{escape_text(author or title)}</name></author>",
+    ]
+    for post in posts:
+        url = site_url + post["url"]
+        lines += [
+            "  <entry>",
+            f"    <title>{escape_text(post['title'])}</title>",
+            f'    <link href="{escape_attribute(url)}"/>',
+            f"    <id>{escape_text(url)}</id>",
+            f"    <updated>{atom_time(post['mtime'])}</updated>",
+            f"    <summary>{escape_text(post['summary'])}</summary>",
+            "  </entry>",
+        ]
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def write_site_files(
+    pages: dict,
+    dest_dir: str,
+    template: Template,
+    basepath: str,
+    previous: dict = None,
+    site_url: str = None,
+    blog_dir: str = "blog",
+    title: str = "Blog",
+    per_page: int = 10,
+    author: str = None,
+):
+    # Writes the blog listings and, given the site's URL, the sitemap and
+    # feed. Returns the output records by path relative to dest_dir and how
+    # many files were written; files from the previous build that are no
+    # longer generated are removed, unless a page now lives at that path.
+    previous = previous or {}
+    posts = blog_posts(pages, dest_dir, basepath, blog_dir)
+    page_paths = {output_path(page["dest"], dest_dir) for page in pages.values()}
+
+    files = {}
+    # A hand-written index for the blog replaces the generated listing
+    if posts and listing_path(blog_dir, 1) not in page_paths:
+        files.update(
+            render_listings(posts, template, basepath, blog_dir, title, per_page)
+        )
+
+    if site_url:
+        site_url = site_url.rstrip("/")
+        lastmods = {
+            path_url(output_path(page["dest"], dest_dir), basepath): page["mtime"]
+            for page in pages.values()
+        }
+        urls = sorted(lastmods) + [path_url(path, basepath) for path in sorted(files)]
+        files[SITEMAP_PATH] = render_sitemap(urls, lastmods, site_url)
+        feed_url = path_url(FEED_PATH, basepath)
+        files[FEED_PATH] = render_feed(posts, site_url, feed_url, title, author)
+
+    records = {}
+    written = 0
+    for path, text in files.items():
+        dest_path = os.path.join(dest_dir, path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        record, file_written = write_output(dest_path, text, previous.get(path))
+        records[path] = record
+        written += file_written
+
+    for path in previous.keys() - records.keys() - page_paths:
+        dest_path = os.path.join(dest_dir, path)
+        if os.path.exists(dest_path):
+            remove_output(dest_path, dest_dir)
+
+    return records, written
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from main import build
+
+
+class SiteTestCase(unittest.TestCase):
+    # A temporary directory for a test site. Paths given to the helpers are
+    # relative to it; absolute paths are used as they are.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def path(self, name):
+        return os.path.normpath(os.path.join(self.root, name))
+
+    def write(self, name, text):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, name):
+        with open(self.path(name)) as file:
+            return file.read()
+
+    def outputs(self, directory="docs"):
+        # Every file under directory by relative path, with its text
+        directory = self.path(directory)
+        outputs = {}
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path) as file:
+                    outputs[os.path.relpath(path, directory)] = file.read()
+        return outputs
+
+    def build(self, **kwargs):
+        # main.build on the site, quietly
+        options = {
+            "content_dir": self.path("content"),
+            "static_dir": self.path("static"),
+            "template_path": self.path("template.html"),
+            "dest_dir": self.path("docs"),
+            "manifest_path": self.path(".cache/manifest.json"),
+            "shard_dir": self.path("shards"),
+        }
+        options.update(kwargs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return build(**options)
@@ -1,4 +1,45 @@
+# Rendered attribute strings by props items, for props with several values
+# or something to escape; images repeat the same few all over a site
+ATTRIBUTE_CACHE = {}
+ATTRIBUTE_CACHE_SIZE = 4096
+
+
+def escape_text(text: str):
+    # Most values contain nothing to escape, and these membership checks are
+    # far cheaper than running the replacements
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value: str):
+    if '"' in value:
+        return escape_text(value).replace('"', "&quot;")
+    return escape_text(value)
+
+
+def render_attributes(props: dict):
+    # A lone plain value, the usual link, is cheaper to format than to look
+    # up: most links on a site are unique, so the cache would only churn
+    if len(props) == 1:
+        for k, v in props.items():
+            if type(v) is str and not ('"' in v or "&" in v or "<" in v or ">" in v):
+                return f' {k}="{v}"'
+    key = tuple(props.items())
+    attributes = ATTRIBUTE_CACHE.get(key)
+    if attributes is None:
+        attributes = "".join(
+            f' {k}="{escape_attribute(str(v))}"' for k, v in props.items()
+        )
+        if len(ATTRIBUTE_CACHE) >= ATTRIBUTE_CACHE_SIZE:
+            ATTRIBUTE_CACHE.clear()
+        ATTRIBUTE_CACHE[key] = attributes
+    return attributes
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str = None,
@@ -15,30 +56,31 @@ class HTMLNode:
         raise NotImplementedError("to_html method not implemented")
 
     def props_to_html(self):
-        props = ""
-
-        if self.props:
-            for k, v in self.props.items():
-                props += f' {k}="{v}"'
-
-        return props
+        return render_attributes(self.props) if self.props else ""
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, value: str, tag: str = None, props: dict = None):
-        super().__init__(tag=tag, value=value, children=None, props=props)
+        # Assigned directly: these are created once per inline span
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
 
     def to_html(self):
         if self.value is None:
             raise ValueError("invalid HTML: no value")
 
+        value = escape_text(self.value)
         return (
-            f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
             if self.tag != None
-            else f"{self.value}"
+            else value
         )
 
     def __repr__(self):
@@ -46,28 +88,75 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list, props: dict = None):
-        super().__init__(tag=tag, value=None, children=children, props=props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("invalid HTML: no tag")
-        if self.children is None:
-            raise ValueError("invalid HTML: no children")
+        return "".join(iter_html(self))
+
+    def __repr__(self):
+        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
 
-        html = f"<{self.tag}{self.props_to_html()}>"
-        for node in self.children:
-            if node.tag == self.tag:
-                if node.value:
-                    html += node.value
-                else:
-                    html += node.to_html()
-            else:
-                html += node.to_html()
 
-        html += f"</{self.tag}>"
+class RawNode(HTMLNode):
+    __slots__ = ()
 
-        return html
+    def __init__(self, value: str):
+        # Already rendered markup, e.g. a fragment from the block cache
+        self.tag = None
+        self.value = value
+        self.children = None
+        self.props = None
+
+    def to_html(self):
+        return self.value
 
     def __repr__(self):
-        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+        return f"RawNode({self.value})"
+
+
+def iter_html(node: HTMLNode):
+    # Walks the tree once with an explicit stack and yields the HTML in
+    # chunks, so no level ever copies the markup of its subtree
+    stack = [node]
+
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        if not isinstance(item, ParentNode):
+            yield item.to_html()
+            continue
+
+        if item.tag is None:
+            raise ValueError("invalid HTML: no tag")
+        if item.children is None:
+            raise ValueError("invalid HTML: no children")
+
+        tag = item.tag
+        yield f"<{tag}{render_attributes(item.props) if item.props else ''}>"
+        stack.append(f"</{tag}>")
+        # Leaves are rendered here in one pass over the children instead of
+        # each taking a trip through the stack and a to_html call
+        for child in reversed(item.children):
+            if type(child) is not LeafNode:
+                stack.append(child)
+                continue
+
+            value = child.value
+            if value is None:
+                raise ValueError("invalid HTML: no value")
+            if "&" in value or "<" in value or ">" in value:
+                value = escape_text(value)
+            if child.tag is None or (child.tag == tag and value):
+                stack.append(value)
+            else:
+                props = child.props
+                attributes = render_attributes(props) if props else ""
+                stack.append(f"<{child.tag}{attributes}>{value}</{child.tag}>")
@@ -0,0 +1,173 @@
+import os
+import struct
+
+from manifest import hash_file
+from static_sync import copy_file, is_unchanged, remove_output
+
+# Variant widths in pixels; only those narrower than the source are made
+IMAGE_WIDTHS = (480, 960, 1600)
+IMAGE_QUALITY = 80
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def load_pillow():
+    # Pillow is optional: without it images are still measured (PNG only)
+    # but no variants are made
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def png_size(path: str):
+    with open(path, "rb") as file:
+        header = file.read(24)
+    if len(header) < 24 or not header.startswith(PNG_SIGNATURE):
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def variant_path(cache_dir: str, digest: str, width: int, extension: str):
+    # Named by the source content and settings, so a cached variant is
+    # reused for as long as the image is unchanged
+    name = f"{digest}-{width}w-q{IMAGE_QUALITY}{extension}"
+    return os.path.join(cache_dir, digest[:2], name)
+
+
+def render_variants(source: str, digest: str, cache_dir: str):
+    # Runs on a worker process; returns the source size and the variants
+    # that exist in the cache afterwards
+    Image = load_pillow()
+    extension = os.path.splitext(source)[1].lower()
+    with Image.open(source) as image:
+        width, height = image.size
+        variants = []
+        for variant_width in IMAGE_WIDTHS:
+            if variant_width >= width:
+                break
+            path = variant_path(cache_dir, digest, variant_width, extension)
+            if not os.path.exists(path):
+                size = (variant_width, max(1, round(height * variant_width / width)))
+                resized = image.resize(size, Image.LANCZOS)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                resized.save(
+                    tmp_path,
+                    format=image.format,
+                    optimize=True,
+                    quality=IMAGE_QUALITY,
+                )
+                os.replace(tmp_path, path)
+            variants.append((variant_width, path))
+    return width, height, variants
+
+
+def output_variant_path(file: str, width: int):
+    base, extension = os.path.splitext(file)
+    return f"{base}-{width}w{extension}"
+
+
+def build_images(
+    static_dir: str,
+    dest_dir: str = None,
+    cache_dir: str = "./.cache/images",
+    previous: dict = None,
+    link: bool = False,
+):
+    # Measures every image under static_dir and makes resized variants of
+    # new or changed ones, copying them from the cache into dest_dir (no
+    # dest_dir just fills the cache, for shards). Returns the records by
+    # path relative to static_dir and how many images were processed.
+    previous = previous or {}
+    Image = load_pillow()
+    records = {}
+    pending = []
+    processed = 0
+
+    for root, dirs, names in os.walk(static_dir):
+        dirs.sort()
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            source = os.path.join(root, name)
+            file = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            stat = os.stat(source)
+            record = previous.get(file)
+            if (
+                record is not None
+                and record["size"] == stat.st_size
+                and record["mtime"] == stat.st_mtime_ns
+                and record["pillow"] == (Image is not None)
+                and all(os.path.exists(cached) for *_, cached in record["variants"])
+            ):
+                records[file] = record
+                continue
+
+            record = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "hash": hash_file(source),
+                "pillow": Image is not None,
+                "width": None,
+                "height": None,
+                "variants": [],
+            }
+            records[file] = record
+            processed += 1
+            if Image is not None:
+                pending.append((file, source, record["hash"]))
+            else:
+                size = png_size(source)
+                if size is not None:
+                    record["width"], record["height"] = size
+
+    # Resizing is CPU bound, so variants are made on a process pool
+    if len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(
+                render_variants,
+                [source for _, source, _ in pending],
+                [digest for _, _, digest in pending],
+                [cache_dir] * len(pending),
+            )
+            results = list(results)
+    else:
+        results = [
+            render_variants(source, digest, cache_dir) for _, source, digest in pending
+        ]
+    for (file, _, _), (width, height, variants) in zip(pending, results):
+        records[file].update(width=width, height=height)
+        records[file]["variants"] = [
+            [variant_width, output_variant_path(file, variant_width), path]
+            for variant_width, path in variants
+        ]
+
+    if dest_dir is not None:
+        sync_variants(records, previous, dest_dir, link)
+    return records, processed
+
+
+def sync_variants(records: dict, previous: dict, dest_dir: str, link: bool):
+    current = set()
+    for record in records.values():
+        for _, output, cached in record["variants"]:
+            destination = os.path.join(dest_dir, output)
+            current.add(output)
+            if not is_unchanged(cached, destination, checksum=False):
+                copy_file(cached, destination, link=link)
+
+    for record in previous.values():
+        for _, output, _ in record["variants"]:
+            destination = os.path.join(dest_dir, output)
+            if output not in current and os.path.exists(destination):
+                remove_output(destination, dest_dir)
+
+
+def variant_outputs(records: dict):
+    return [
+        output for record in records.values() for _, output, _ in record["variants"]
+    ]
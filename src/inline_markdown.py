@@ -2,6 +2,10 @@ import re
 
 from text_node import TextNode, TextType
 
+DELIMITER_PATTERN = re.compile(r"\*\*|\*|`")
+IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"\[(.*?)\]\((.*?)\)")
+
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
@@ -16,7 +20,7 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
             raise ValueError(f'Invalid markdown: unmatched delimiter "{delimiter}"')
 
         for i in range(len(split_text)):
-            if split_text[i] == "i":
+            if split_text[i] == "":
                 continue
             if i % 2 == 0:
                 new_nodes.append(TextNode(text=split_text[i], text_type=TextType.TEXT))
@@ -71,24 +75,94 @@ def split_nodes_link(old_nodes):
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return LINK_PATTERN.findall(text)
 
 
 def text_to_text_nodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # Single left-to-right scan producing the same nodes as chaining
+    # split_nodes_delimiter ("**", "*", "`"), split_nodes_image and
+    # split_nodes_link: bold pairs up first, italic only outside bold, code
+    # only outside both, and images/links only in the remaining plain text.
+    if text.count("**") % 2 != 0:
+        raise ValueError('Invalid markdown: unmatched delimiter "**"')
+
+    nodes = []
+    bold = italic = code = False
+    code_error = False
+    start = 0
+
+    for match in DELIMITER_PATTERN.finditer(text):
+        delimiter = match.group()
+        segment = text[start : match.start()]
+
+        if bold:
+            if delimiter != "**":
+                continue
+            append_segment(nodes, segment, TextType.BOLD)
+            bold = False
+        elif italic:
+            if delimiter == "`":
+                continue
+            if delimiter == "**":
+                raise ValueError('Invalid markdown: unmatched delimiter "*"')
+            append_segment(nodes, segment, TextType.ITALIC)
+            italic = False
+        elif code and delimiter == "`":
+            append_segment(nodes, segment, TextType.CODE)
+            code = False
+        else:
+            if code:
+                # The backtick pair is broken by a bold or italic delimiter.
+                # Unmatched "*" takes precedence, so keep scanning for it.
+                code_error = True
+                code = False
+            append_plain_text(nodes, segment)
+            bold = delimiter == "**"
+            italic = delimiter == "*"
+            code = delimiter == "`"
+
+        start = match.end()
+
+    if italic:
+        raise ValueError('Invalid markdown: unmatched delimiter "*"')
+    if code or code_error:
+        raise ValueError('Invalid markdown: unmatched delimiter "`"')
+
+    append_plain_text(nodes, text[start:])
 
     return nodes
+
+
+def append_segment(nodes, text, text_type):
+    if text != "":
+        nodes.append(TextNode(text, text_type))
+
+
+def append_plain_text(nodes, text):
+    if text == "":
+        return
+
+    start = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        append_links(nodes, text[start : match.start()])
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        start = match.end()
+    append_links(nodes, text[start:])
+
+
+def append_links(nodes, text):
+    if text == "":
+        return
+
+    start = 0
+    for match in LINK_PATTERN.finditer(text):
+        if match.start() > start:
+            nodes.append(TextNode(text[start : match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        start = match.end()
+    if start < len(text):
+        nodes.append(TextNode(text[start:], TextType.TEXT))
@@ -1,85 +1,482 @@
+import asyncio
 import os
-import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 
-from block import markdown_to_html_node, extract_title
+from feeds import write_site_files
+from assets import build_assets
+from compress import compress_outputs, format_compress_counts, sibling_paths
+from images import build_images, variant_outputs
+from manifest import (
+    empty_manifest,
+    hash_file,
+    hash_json,
+    load_manifest,
+    page_key,
+    save_manifest,
+)
+from output import format_output_counts, remove_untracked, write_output
+from profiler import Profiler, profile_page
+from render import (
+    page_metadata,
+    read_source,
+    render_large_page,
+    render_markdown,
+    render_page,
+)
+from render_cache import BlockCache, format_cache_counts
+from shard import (
+    select_shard,
+    shard_manifest_path,
+    shard_output_dir,
+    site_summary,
+)
+from static_sync import remove_output, sync_directory
+from template import Template, asset_urls, load_template
+from text_node import image_registry
+from urls import find_broken_links
 
+# Per-process block cache used by --jobs workers, set up by init_worker
+worker_cache = None
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    print(basepath)
-    copy_content(source_directory="./static", destination_directory="./docs")
-    generate_pages_recursive(
-        dir_path_content=f"./content",
-        template_path="./template.html",
-        dest_dir_path="./docs",
+
+def build(
+    basepath: str = "/",
+    incremental: bool = False,
+    jobs: int = 1,
+    io_depth: int = 0,
+    cache: BlockCache = None,
+    checksum: bool = False,
+    link: bool = False,
+    content_dir: str = "./content",
+    static_dir: str = "./static",
+    template_path: str = "./template.html",
+    dest_dir: str = "./docs",
+    manifest_path: str = "./.cache/manifest.json",
+    profiler: Profiler = None,
+    shard: tuple = None,
+    shard_dir: str = "./.cache/shards",
+    minify_html: bool = False,
+    compress: bool = False,
+    site_url: str = None,
+    blog_dir: str = "blog",
+    posts_per_page: int = 10,
+    feed_author: str = None,
+):
+    if shard is not None:
+        # Each shard is a separate site with its own manifest; merge_shards
+        # copies the static files once when assembling them
+        dest_dir = shard_output_dir(shard_dir, shard[0])
+        manifest_path = shard_manifest_path(shard_dir, shard[0])
+
+    # Image variants and minified assets are cached next to the manifest
+    cache_dir = os.path.dirname(manifest_path) or "."
+
+    # Full builds load the manifest too: its output hashes let unchanged pages
+    # skip the write, so their mtimes survive for rsync and CDN uploads
+    manifest = load_manifest(manifest_path)
+
+    # Shards only need the image sizes; merge_shards writes the variants
+    images, processed = build_images(
+        static_dir,
+        dest_dir if shard is None else None,
+        cache_dir=os.path.join(cache_dir, "images"),
+        previous=manifest.get("images"),
+        link=link,
+    )
+    print(f"Images: {processed} processed, {len(images) - processed} unchanged")
+    assets, processed = build_assets(
+        static_dir,
+        dest_dir if shard is None else None,
+        cache_dir=os.path.join(cache_dir, "assets"),
+        previous=manifest.get("assets"),
+    )
+    print(f"Assets: {processed} processed, {len(assets) - processed} unchanged")
+    urls = asset_urls(assets, basepath)
+
+    static_files = []
+    if shard is None:
+        with profiler.stage("static_sync") if profiler else nullcontext():
+            static_files, static_counts = sync_directory(
+                source_directory=static_dir,
+                destination_directory=dest_dir,
+                previous_files=manifest.get("static", []),
+                checksum=checksum,
+                link=link,
+            )
+        print(
+            f"Static files: {static_counts['copied']} copied, "
+            f"{static_counts['unchanged']} unchanged, "
+            f"{static_counts['removed']} removed"
+        )
+
+    pages, page_counts = generate_pages_recursive(
+        dir_path_content=content_dir,
+        template_path=template_path,
+        dest_dir_path=dest_dir,
         basepath=basepath,
+        manifest=manifest,
+        incremental=incremental,
+        jobs=jobs,
+        io_depth=io_depth,
+        cache=cache,
+        profiler=profiler,
+        shard=shard,
+        images=image_registry(images),
+        assets=urls,
+        minify_html=minify_html,
     )
 
+    # Listings, sitemap and feed come from the page metadata in the manifest;
+    # a shard only has some of the pages, so they're written when merging
+    generated = {}
+    if shard is None:
+        generated, generated_written = write_site_files(
+            pages,
+            dest_dir,
+            load_template(template_path, basepath, urls, minify_html),
+            basepath,
+            previous=manifest.get("generated"),
+            site_url=site_url,
+            blog_dir=blog_dir,
+            per_page=posts_per_page,
+            author=feed_author,
+        )
+        print(f"Generated files: {generated_written} of {len(generated)} written")
+
+    outputs = {os.path.relpath(page["dest"], dest_dir) for page in pages.values()}
+    outputs.update(static_files)
+    outputs.update(generated)
+    outputs.update(variant_outputs(images))
+    outputs.update(record["output"] for record in assets.values())
+
+    # Runs last so it sees every output; shards leave it to merge_shards
+    compressed = {}
+    if shard is None:
+        compressed, compress_counts = compress_outputs(
+            dest_dir, outputs, manifest.get("compressed"), enabled=compress
+        )
+        if compress:
+            print(format_compress_counts(compress_counts))
+    outputs.update(sibling_paths(compressed))
+
+    if not incremental:
+        # A full build leaves exactly its own outputs behind
+        page_counts["deleted"] += remove_untracked(dest_dir, outputs)
+    print(format_output_counts(page_counts))
+
+    new_manifest = empty_manifest()
+    new_manifest["pages"] = pages
+    new_manifest["static"] = static_files
+    new_manifest["generated"] = generated
+    new_manifest["images"] = images
+    new_manifest["assets"] = assets
+    new_manifest["compressed"] = compressed
+    if shard is not None:
+        new_manifest["shard"] = list(shard)
+        # Links in the pages are already rewritten for the basepath
+        new_manifest["basepath"] = basepath
+        sources = (source for source, _ in discover_pages(content_dir, dest_dir))
+        new_manifest["site"] = site_summary(sources)
+    save_manifest(new_manifest, manifest_path)
+
+    # A shard only sees its own pages; links are checked after merging
+    if shard is None:
+        report_broken_links(pages, static_files + list(generated), dest_dir)
+
+    if cache is not None:
+        print(format_cache_counts(cache.counts()))
 
-def copy_content(source_directory: str, destination_directory: str):
-    if os.path.exists(destination_directory):
-        shutil.rmtree(destination_directory)
+    return new_manifest
 
-    os.mkdir(destination_directory)
-    files = os.listdir(source_directory)
 
-    for file in files:
-        if os.path.isfile(f"{source_directory}/{file}"):
-            shutil.copy(f"{source_directory}/{file}", destination_directory)
+def report_broken_links(pages: dict, static_files: list, dest_dir: str):
+    broken_links = find_broken_links(pages, static_files, dest_dir)
+    for source, url in broken_links:
+        print(f"Broken link in {source}: {url}")
+    if broken_links:
+        print(f"{len(broken_links)} broken internal links")
+
+
+def discover_pages(dir_path_content: str, dest_dir_path: str):
+    pages = []
+
+    for content in sorted(os.listdir(dir_path_content)):
+        if os.path.isfile(f"{dir_path_content}/{content}"):
+            html_filename = os.path.splitext(content)[0] + ".html"
+            pages.append(
+                (f"{dir_path_content}/{content}", f"{dest_dir_path}/{html_filename}")
+            )
         else:
-            os.mkdir(f"{destination_directory}/{file}")
-            copy_content(
-                f"{source_directory}/{file}", f"{destination_directory}/{file}"
+            pages.extend(
+                discover_pages(
+                    dir_path_content=f"{dir_path_content}/{content}",
+                    dest_dir_path=f"{dest_dir_path}/{content}",
+                )
             )
 
+    return pages
+
 
 def generate_pages_recursive(
-    dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    basepath: str,
+    manifest: dict = None,
+    incremental: bool = True,
+    jobs: int = 1,
+    io_depth: int = 0,
+    cache: BlockCache = None,
+    profiler: Profiler = None,
+    shard: tuple = None,
+    images: dict = None,
+    assets: dict = None,
+    minify_html: bool = False,
 ):
     os.makedirs(dest_dir_path, exist_ok=True)
-    contents = os.listdir(dir_path_content)
+    previous_pages = manifest["pages"] if manifest else {}
+    template_hash = hash_file(template_path)
+    images = images or {}
+    context_hash = render_context(images, assets, minify_html)
+    template = load_template(template_path, basepath, assets, minify_html)
+    pages = {}
+    pending = []
 
-    for content in contents:
-        if os.path.isfile(f"{dir_path_content}/{content}"):
-            html_filename = os.path.splitext(content)[0] + ".html"
-            generate_page(
-                from_path=f"{dir_path_content}/{content}",
-                template_path=template_path,
-                dest_path=f"{dest_dir_path}/{html_filename}",
-                basepath=basepath,
+    discovered = discover_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        discovered = select_shard(discovered, *shard)
+
+    for from_path, dest_path in discovered:
+        key = page_key(hash_file(from_path), template_hash, basepath, context_hash)
+        # Normalized so "./content" and "content" builds share a manifest
+        source = os.path.normpath(from_path)
+        pages[source] = {
+            "key": key,
+            "dest": os.path.normpath(dest_path),
+            "mtime": os.path.getmtime(from_path),
+        }
+
+        previous = previous_pages.get(source, {})
+        if (
+            incremental
+            and previous.get("key") == key
+            and "output" in previous
+            and os.path.exists(dest_path)
+        ):
+            for name in ("links", "title", "summary", "output"):
+                pages[source][name] = previous[name]
+            continue
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        pending.append((from_path, dest_path, previous.get("output")))
+
+    # (metadata, output record, written) of every rendered page, by source
+    results = {}
+    if profiler is not None:
+        # Serial and uncached, so every stage of every page is measured
+        for from_path, dest_path, previous_output in pending:
+            log_page(from_path, template_path, dest_path)
+            document, *written = profile_page(
+                profiler,
+                from_path,
+                template,
+                dest_path,
+                basepath,
+                previous_output,
+                images,
             )
-        else:
-            os.makedirs(f"{dest_dir_path}/{content}")
-            generate_pages_recursive(
-                dir_path_content=f"{dir_path_content}/{content}",
-                template_path=template_path,
-                dest_dir_path=f"{dest_dir_path}/{content}",
-                basepath=basepath,
+            results[from_path] = (page_metadata(document), *written)
+    elif jobs > 1 and len(pending) > 1:
+        counts, results = generate_pages_parallel(
+            pending, template_path, template, basepath, jobs, cache, images
+        )
+        if cache is not None:
+            cache.add_counts(counts)
+    elif io_depth > 0:
+        results = asyncio.run(
+            generate_pages_async(
+                pending, template_path, template, basepath, io_depth, cache, images
+            )
+        )
+    else:
+        for from_path, dest_path, previous_output in pending:
+            log_page(from_path, template_path, dest_path)
+            document, *written = render_page(
+                from_path, template, dest_path, basepath, cache, previous_output, images
             )
-    pass
+            results[from_path] = (page_metadata(document), *written)
 
+    written = 0
+    for from_path, (metadata, output, page_written) in results.items():
+        page = pages[os.path.normpath(from_path)]
+        page.update(metadata)
+        page["output"] = output
+        written += page_written
 
-def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    deleted = remove_stale_pages(previous_pages, pages, dest_dir_path)
+    counts = {"written": written, "skipped": len(pages) - written, "deleted": deleted}
+
+    return pages, counts
+
+
+def render_context(images: dict, assets: dict, minify_html: bool):
+    # Image sizes, fingerprinted asset URLs and minification all change the
+    # HTML without touching the source or template, so they're in page keys
+    return hash_json([images or {}, assets or {}, minify_html])
+
+
+def remove_stale_pages(previous_pages: dict, pages: dict, dest_dir_path: str):
+    current_dests = {page["dest"] for page in pages.values()}
+    removed = 0
+
+    for from_path, previous in previous_pages.items():
+        dest_path = os.path.normpath(previous["dest"])
+        if from_path in pages or dest_path in current_dests:
+            continue
+        if not os.path.exists(dest_path):
+            continue
 
-    with open(from_path, "r") as md_file:
-        markdown = md_file.read()
+        print(f"Removing stale page {dest_path}")
+        remove_output(dest_path, dest_dir_path)
+        removed += 1
 
-    with open(template_path, "r") as html_file:
-        template_html = html_file.read()
+    return removed
 
-    title = extract_title(markdown)
-    html = markdown_to_html_node(markdown=markdown).to_html()
 
-    template_html = template_html.replace("{{ Title }}", title)
-    template_html = template_html.replace("{{ Content }}", html)
-    template_html = template_html.replace('href="', f'href="{basepath}')
-    template_html = template_html.replace('src="', f'src="{basepath}')
+def generate_pages_parallel(
+    pending: list,
+    template_path: str,
+    template: Template,
+    basepath: str,
+    jobs: int,
+    cache: BlockCache = None,
+    images: dict = None,
+):
+    # Several chunks per worker keeps IPC overhead low while still balancing
+    # pages of very different sizes across the pool
+    chunksize = max(1, len(pending) // (jobs * 4))
+    render = partial(
+        render_page_job, template=template, basepath=basepath, images=images
+    )
+    # Workers build their own caches; shipping the parent's entries to every
+    # chunk would cost more than it saves. The disk tier is shared.
+    cache_config = (cache.maxsize, cache.directory) if cache is not None else None
+    counts = {"hits": 0, "disk_hits": 0, "misses": 0}
+    results = {}
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(cache_config,),
+    ) as executor:
+        # map yields in submission order, so logging matches the serial build
+        for job, job_counts, result in executor.map(
+            render, pending, chunksize=chunksize
+        ):
+            log_page(job[0], template_path, job[1])
+            results[job[0]] = result
+            for name, count in job_counts.items():
+                counts[name] += count
+
+    return counts, results
 
-    with open(dest_path, "w") as file:
-        file.write(template_html)
+
+async def generate_pages_async(
+    pending: list,
+    template_path: str,
+    template: Template,
+    basepath: str,
+    depth: int,
+    cache: BlockCache = None,
+    images: dict = None,
+):
+    # Reads and writes run on worker threads while pages render on the event
+    # loop. The queues keep them in page order and bound how many are in
+    # flight, so a slow volume holds back the reader instead of growing memory.
+    reads = asyncio.Queue(maxsize=depth)
+    writes = asyncio.Queue(maxsize=depth)
+    results = {}
+
+    async def read_sources():
+        for from_path, dest_path, previous_output in pending:
+            read = asyncio.ensure_future(asyncio.to_thread(read_source, from_path))
+            await reads.put((from_path, dest_path, previous_output, read))
+        await reads.put(None)
+
+    async def render_pages():
+        while (job := await reads.get()) is not None:
+            from_path, dest_path, previous_output, read = job
+            markdown = await read
+            log_page(from_path, template_path, dest_path)
+            if markdown is None:
+                document, *written = render_large_page(
+                    from_path,
+                    template,
+                    dest_path,
+                    basepath,
+                    cache,
+                    previous_output,
+                    images,
+                )
+                results[from_path] = (page_metadata(document), *written)
+                continue
+            document, chunks = render_markdown(
+                markdown, template, basepath, cache, images
+            )
+            html = "".join(chunks)
+            write = asyncio.to_thread(write_output, dest_path, html, previous_output)
+            metadata = page_metadata(document)
+            await writes.put((from_path, metadata, asyncio.ensure_future(write)))
+        await writes.put(None)
+
+    async def write_outputs():
+        while (job := await writes.get()) is not None:
+            from_path, metadata, write = job
+            results[from_path] = (metadata, *await write)
+
+    await asyncio.gather(read_sources(), render_pages(), write_outputs())
+    return results
+
+
+def init_worker(cache_config: tuple):
+    global worker_cache
+    worker_cache = BlockCache(*cache_config) if cache_config else None
+
+
+def render_page_job(job: tuple, template: Template, basepath: str, images: dict):
+    from_path, dest_path, previous_output = job
+    before = worker_cache.counts() if worker_cache is not None else {}
+    document, *written = render_page(
+        from_path,
+        template,
+        dest_path,
+        basepath,
+        worker_cache,
+        previous_output,
+        images,
+    )
+    result = (page_metadata(document), *written)
+    if worker_cache is None:
+        return job, {}, result
+    after = worker_cache.counts()
+    counts = {name: after[name] - before[name] for name in after}
+    return job, counts, result
+
+
+def log_page(from_path: str, template_path: str, dest_path: str):
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+
+
+def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str):
+    log_page(from_path, template_path, dest_path)
+    template = load_template(template_path, basepath=basepath)
+    render_page(from_path, template, dest_path, basepath)
 
 
 if __name__ == "__main__":
-    main()
+    from cli import main
+
+    main(["build", *sys.argv[1:]])
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+
+GENERATOR_VERSION = "8"
+
+
+def hash_bytes(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_json(value):
+    return hash_bytes(json.dumps(value, sort_keys=True).encode())
+
+
+def hash_file(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        # Read in chunks so large sources are never held in memory whole
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_key(
+    source_hash: str, template_hash: str, basepath: str, context_hash: str = ""
+):
+    # context_hash covers whatever else ends up in the HTML, see render_context
+    return hash_bytes(
+        f"{GENERATOR_VERSION}\0{template_hash}\0{basepath}\0{context_hash}\0"
+        f"{source_hash}".encode()
+    )
+
+
+def empty_manifest():
+    return {"version": GENERATOR_VERSION, "pages": {}, "static": []}
+
+
+def load_manifest(path: str):
+    if not os.path.exists(path):
+        return empty_manifest()
+
+    try:
+        with open(path, "r") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return empty_manifest()
+
+    # A manifest written by another generator version can't be trusted
+    if manifest.get("version") != GENERATOR_VERSION:
+        return empty_manifest()
+
+    return manifest
+
+
+def save_manifest(manifest: dict, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
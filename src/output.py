@@ -0,0 +1,83 @@
+import hashlib
+import os
+
+from manifest import hash_bytes, hash_file
+
+
+def output_record(path: str, digest: str):
+    # Recorded in the manifest so the next build can trust the hash without
+    # reading the file back, as long as its size and mtime haven't moved
+    stat = os.stat(path)
+    return {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def output_unchanged(path: str, digest: str, size: int, previous: dict = None):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if stat.st_size != size:
+        return False
+    if previous and previous["mtime"] == stat.st_mtime_ns:
+        return previous["hash"] == digest and previous["size"] == size
+    return hash_file(path) == digest
+
+
+def write_output(path: str, text: str, previous: dict = None):
+    # Returns the output record and whether the file was actually written
+    data = text.encode()
+    digest = hash_bytes(data)
+    if output_unchanged(path, digest, len(data), previous):
+        return output_record(path, digest), False
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return output_record(path, digest), True
+
+
+def write_output_chunks(path: str, chunks, previous: dict = None):
+    # Like write_output for output too large to hold in memory: the chunks are
+    # hashed while they stream to a temp file, which is dropped if unchanged
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            for chunk in chunks:
+                data = chunk.encode()
+                digest.update(data)
+                size += len(data)
+                file.write(data)
+
+        if output_unchanged(path, digest.hexdigest(), size, previous):
+            return output_record(path, digest.hexdigest()), False
+        os.replace(tmp_path, path)
+        return output_record(path, digest.hexdigest()), True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def remove_untracked(dest_dir: str, outputs: set):
+    # outputs holds paths relative to dest_dir; anything else is left over
+    # from an earlier build and goes, like the old rmtree of the whole tree.
+    # static_sync pulls in shutil and threading, which render-one never needs.
+    from static_sync import remove_output
+
+    removed = 0
+    for root, _, files in os.walk(dest_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, dest_dir) not in outputs:
+                remove_output(path, dest_dir)
+                removed += 1
+    return removed
+
+
+def format_output_counts(counts: dict):
+    return (
+        f"Pages: {counts['written']} written, {counts['skipped']} unchanged, "
+        f"{counts['deleted']} deleted"
+    )
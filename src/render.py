@@ -0,0 +1,106 @@
+import os
+from functools import partial
+
+from block import Document, analyze_markdown, iter_document_nodes
+from html_node import escape_text, iter_html
+from output import write_output, write_output_chunks
+from render_cache import BlockCache
+from template import Template
+
+# Sources larger than this are rendered block by block through a temporary
+# file, so memory stays proportional to the largest block, not the page
+STREAMING_THRESHOLD = 16 * 1024 * 1024
+STREAMING_CHUNK_SIZE = 1024 * 1024
+
+
+def page_metadata(document: Document):
+    # Kept in the page's manifest entry, so links can be checked and listings
+    # and feeds written without parsing the page again
+    return {
+        "links": document.links,
+        "title": document.title,
+        "summary": document.summary,
+    }
+
+
+def read_source(path: str):
+    # Large sources are left to render_large_page, which streams them
+    if os.path.getsize(path) > STREAMING_THRESHOLD:
+        return None
+    with open(path, "r") as md_file:
+        return md_file.read()
+
+
+def render_page(
+    from_path: str,
+    template: Template,
+    dest_path: str,
+    basepath: str,
+    cache: BlockCache = None,
+    previous_output: dict = None,
+    images: dict = None,
+):
+    # Returns the page's Document, its output record and whether it was
+    # written; identical output leaves the existing file untouched. images is
+    # the registry from text_node.image_registry.
+    if os.path.getsize(from_path) > STREAMING_THRESHOLD:
+        return render_large_page(
+            from_path, template, dest_path, basepath, cache, previous_output, images
+        )
+
+    with open(from_path, "r") as md_file:
+        markdown = md_file.read()
+
+    document, chunks = render_markdown(markdown, template, basepath, cache, images)
+    # The page is joined so its hash is known before anything is written: an
+    # unchanged page then costs no write at all. Only sources over
+    # STREAMING_THRESHOLD stream, hashing as they go through a temp file.
+    output, written = write_output(dest_path, "".join(chunks), previous_output)
+    return document, output, written
+
+
+def render_markdown(
+    markdown: str,
+    template: Template,
+    basepath: str,
+    cache: BlockCache = None,
+    images: dict = None,
+):
+    document = analyze_markdown(markdown, basepath, cache, images)
+    content = iter_html(document.node)
+    if template.assets or template.minify:
+        content = template.process("".join(content))
+    chunks = template.iter_render(Title=escape_text(document.title), Content=content)
+    return document, chunks
+
+
+def render_large_page(
+    from_path: str,
+    template: Template,
+    dest_path: str,
+    basepath: str,
+    cache: BlockCache = None,
+    previous_output: dict = None,
+    images: dict = None,
+):
+    # The title is only known once every block has been seen, so the content
+    # is spooled to disk first and copied into the template afterwards
+    # Only pages this large need tempfile, which is slow to import
+    import tempfile
+
+    document = Document()
+    with open(from_path, "r") as md_file, tempfile.TemporaryFile("w+") as content:
+        content.write("<div>")
+        nodes = iter_document_nodes(md_file, document, basepath, cache, images)
+        for node in nodes:
+            if template.assets or template.minify:
+                content.write(template.process("".join(iter_html(node))))
+            else:
+                content.writelines(iter_html(node))
+        content.write("</div>")
+        content.seek(0)
+
+        chunks = iter(partial(content.read, STREAMING_CHUNK_SIZE), "")
+        page = template.iter_render(Title=escape_text(document.title), Content=chunks)
+        output, written = write_output_chunks(dest_path, page, previous_output)
+    return document, output, written
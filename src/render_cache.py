@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from manifest import GENERATOR_VERSION
+
+
+class BlockCache:
+    def __init__(self, maxsize: int = 4096, directory: str = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, block: str, basepath: str):
+        entry = self.lookup(block, basepath)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, block: str, basepath: str):
+        # Entries are (fragment, link targets) tuples. The in-memory tier is
+        # keyed by the block text itself: Python already hashes strings, so a
+        # digest is only computed for the disk tier
+        key = (basepath, block)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        if self.directory:
+            entry = self.read_disk(block_digest(block, basepath))
+            if entry is not None:
+                self.remember(key, entry)
+                self.disk_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, block: str, basepath: str, fragment: str, links: list = ()):
+        entry = (fragment, tuple(links))
+        self.remember((basepath, block), entry)
+        if self.directory:
+            self.write_disk(block_digest(block, basepath), entry)
+
+    def remember(self, key: tuple, entry: tuple):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def disk_path(self, digest: str):
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def read_disk(self, digest: str):
+        try:
+            with open(self.disk_path(digest), "r") as file:
+                fragment, links = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        return fragment, tuple(links)
+
+    def write_disk(self, digest: str, entry: tuple):
+        path = self.disk_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name: worker processes may share the directory
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+
+    def add_counts(self, counts: dict):
+        self.hits += counts["hits"]
+        self.disk_hits += counts["disk_hits"]
+        self.misses += counts["misses"]
+
+    def counts(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def __repr__(self):
+        return f"BlockCache({len(self.entries)}/{self.maxsize}, {self.counts()})"
+
+
+def block_digest(block: str, basepath: str):
+    data = f"{GENERATOR_VERSION}\0{basepath}\0{block}".encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def format_cache_counts(counts: dict):
+    lookups = counts["hits"] + counts["disk_hits"] + counts["misses"]
+    hit_rate = (counts["hits"] + counts["disk_hits"]) / lookups if lookups else 0
+    return (
+        f"Block cache: {counts['hits']} hits, {counts['disk_hits']} disk hits, "
+        f"{counts['misses']} misses ({hit_rate:.0%} hit rate)"
+    )
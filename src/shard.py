@@ -0,0 +1,205 @@
+import glob
+import hashlib
+import heapq
+import os
+
+from assets import build_assets
+from compress import compress_outputs, format_compress_counts, sibling_paths
+from feeds import write_site_files
+from images import build_images, variant_outputs
+from manifest import empty_manifest, load_manifest, save_manifest
+from output import (
+    format_output_counts,
+    output_record,
+    output_unchanged,
+    remove_untracked,
+)
+from static_sync import copy_file, sync_directory
+from template import asset_urls, load_template
+
+# Fixed cost added to every page when balancing, so shards of many tiny
+# pages aren't treated as free
+PAGE_WEIGHT = 1024
+
+
+def path_hash(path: str):
+    # Not hash(): string hashing is randomized per process
+    return hashlib.sha256(path.encode()).hexdigest()
+
+
+def assign_shards(pages: list, count: int):
+    # pages is a list of (source, size). Largest pages go first to the least
+    # loaded shard; path hashes break ties, so every machine agrees
+    order = sorted(pages, key=lambda page: (-page[1], path_hash(page[0])))
+    loads = [(0, index) for index in range(1, count + 1)]
+    shards = {}
+    for source, size in order:
+        load, index = heapq.heappop(loads)
+        shards[source] = index
+        heapq.heappush(loads, (load + size + PAGE_WEIGHT, index))
+    return shards
+
+
+def select_shard(pages: list, index: int, count: int):
+    # pages is the (from_path, dest_path) list from discover_pages
+    sizes = [(os.path.normpath(source), os.path.getsize(source)) for source, _ in pages]
+    shards = assign_shards(sizes, count)
+    return [page for page in pages if shards[os.path.normpath(page[0])] == index]
+
+
+def site_summary(sources):
+    sources = sorted(os.path.normpath(source) for source in sources)
+    return {"pages": len(sources), "digest": path_hash("\0".join(sources))}
+
+
+def shard_output_dir(shard_dir: str, index: int):
+    return os.path.join(shard_dir, str(index))
+
+
+def shard_manifest_path(shard_dir: str, index: int):
+    return os.path.join(shard_dir, f"shard-{index}.json")
+
+
+def load_shard_manifests(shard_dir: str):
+    manifests = []
+    for path in sorted(glob.glob(os.path.join(shard_dir, "shard-*.json"))):
+        manifest = load_manifest(path)
+        if "shard" not in manifest or "basepath" not in manifest:
+            raise ValueError(f"{path} is not a shard manifest of this version")
+        manifests.append(manifest)
+    if not manifests:
+        raise ValueError(f"No shard manifests found in {shard_dir}")
+
+    count = manifests[0]["shard"][1]
+    indexes = sorted(manifest["shard"][0] for manifest in manifests)
+    if indexes != list(range(1, count + 1)):
+        raise ValueError(f"Expected shards 1..{count}, found {indexes}")
+    sites = {tuple(sorted(manifest["site"].items())) for manifest in manifests}
+    if len(sites) > 1:
+        raise ValueError("Shards were built from different page sets")
+    basepaths = sorted({manifest["basepath"] for manifest in manifests})
+    if len(basepaths) > 1:
+        raise ValueError(f"Shards were built with different basepaths: {basepaths}")
+
+    return manifests
+
+
+def merge_shards(
+    shard_dir: str,
+    basepath: str = "/",
+    static_dir: str = "./static",
+    template_path: str = "./template.html",
+    dest_dir: str = "./docs",
+    manifest_path: str = "./.cache/manifest.json",
+    checksum: bool = False,
+    link: bool = False,
+    minify_html: bool = False,
+    compress: bool = False,
+    site_url: str = None,
+    blog_dir: str = "blog",
+    posts_per_page: int = 10,
+    feed_author: str = None,
+):
+    manifests = load_shard_manifests(shard_dir)
+    if manifests[0]["basepath"] != basepath:
+        raise ValueError(
+            f"Shards were built with basepath {manifests[0]['basepath']!r}, "
+            f"not {basepath!r}"
+        )
+
+    pages = {}
+    # Output path relative to the site root -> (shard index, path in the shard)
+    outputs = {}
+    for manifest in manifests:
+        index = manifest["shard"][0]
+        shard_output = shard_output_dir(shard_dir, index)
+        for source, page in manifest["pages"].items():
+            relative = os.path.relpath(page["dest"], shard_output)
+            if source in pages:
+                raise ValueError(f"{source} was built by more than one shard")
+            if relative in outputs:
+                other = outputs[relative][0]
+                raise ValueError(f"{relative} was built by shards {other} and {index}")
+            outputs[relative] = (index, page["dest"])
+            pages[source] = dict(page, dest=os.path.normpath(f"{dest_dir}/{relative}"))
+
+    site = manifests[0]["site"]
+    if site_summary(pages) != site:
+        raise ValueError(
+            f"Shards contain {len(pages)} pages but the site has {site['pages']}"
+        )
+
+    previous_manifest = load_manifest(manifest_path)
+    previous_pages = previous_manifest["pages"]
+    static_files, _ = sync_directory(
+        source_directory=static_dir,
+        destination_directory=dest_dir,
+        checksum=checksum,
+        link=link,
+    )
+
+    cache_dir = os.path.dirname(manifest_path) or "."
+    images, _ = build_images(
+        static_dir,
+        dest_dir,
+        cache_dir=os.path.join(cache_dir, "images"),
+        previous=previous_manifest.get("images"),
+        link=link,
+    )
+    assets, _ = build_assets(
+        static_dir,
+        dest_dir,
+        cache_dir=os.path.join(cache_dir, "assets"),
+        previous=previous_manifest.get("assets"),
+    )
+
+    # Like a build, pages whose output didn't change keep their old file
+    counts = {"written": 0, "skipped": 0}
+    for source, page in pages.items():
+        relative = os.path.relpath(page["dest"], dest_dir)
+        shard_output = page["output"]
+        previous = previous_pages.get(source, {}).get("output")
+        if output_unchanged(
+            page["dest"], shard_output["hash"], shard_output["size"], previous
+        ):
+            counts["skipped"] += 1
+        else:
+            copy_file(outputs[relative][1], page["dest"], link=link)
+            counts["written"] += 1
+        page["output"] = output_record(page["dest"], shard_output["hash"])
+
+    generated, _ = write_site_files(
+        pages,
+        dest_dir,
+        load_template(
+            template_path, basepath, asset_urls(assets, basepath), minify_html
+        ),
+        basepath,
+        previous=previous_manifest.get("generated"),
+        site_url=site_url,
+        blog_dir=blog_dir,
+        per_page=posts_per_page,
+        author=feed_author,
+    )
+    tracked = set(outputs) | set(static_files) | set(generated)
+    tracked.update(variant_outputs(images))
+    tracked.update(record["output"] for record in assets.values())
+    compressed, compress_counts = compress_outputs(
+        dest_dir, tracked, previous_manifest.get("compressed"), enabled=compress
+    )
+    if compress:
+        print(format_compress_counts(compress_counts))
+    tracked.update(sibling_paths(compressed))
+    counts["deleted"] = remove_untracked(dest_dir, tracked)
+
+    merged = empty_manifest()
+    merged["pages"] = pages
+    merged["static"] = static_files
+    merged["generated"] = generated
+    merged["images"] = images
+    merged["assets"] = assets
+    merged["compressed"] = compressed
+    save_manifest(merged, manifest_path)
+    print(f"Merged {len(pages)} pages from {len(manifests)} shards into {dest_dir}")
+    print(format_output_counts(counts))
+    return merged
@@ -0,0 +1,128 @@
+import os
+import shutil
+import threading
+
+from manifest import hash_file
+
+
+def list_files(directory: str):
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            files.append(os.path.relpath(os.path.join(root, name), directory))
+    return files
+
+
+def is_unchanged(source: str, destination: str, checksum: bool):
+    try:
+        dest_stat = os.stat(destination)
+    except FileNotFoundError:
+        return False
+
+    source_stat = os.stat(source)
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if not checksum:
+        return False
+
+    # Same content with a different mtime (e.g. a fresh checkout): keep the
+    # file and just carry the source mtime over so the next check is cheap
+    if hash_file(source) != hash_file(destination):
+        return False
+    os.utime(destination, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    return True
+
+
+def copy_file(source: str, destination: str, link: bool = False):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        if link:
+            try:
+                os.link(source, tmp_path)
+                os.replace(tmp_path, destination)
+                return
+            except OSError:
+                # Different filesystem or no hardlink support: copy instead
+                pass
+
+        copy_file_data(source, tmp_path)
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, destination)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def copy_file_data(source: str, destination: str):
+    # copy_file_range keeps the copy in the kernel and lets filesystems that
+    # support it share extents; shutil.copyfile falls back to sendfile
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+
+    shutil.copyfile(source, destination)
+
+
+def sync_directory(
+    source_directory: str,
+    destination_directory: str,
+    previous_files: list = (),
+    checksum: bool = False,
+    link: bool = False,
+):
+    files = list_files(source_directory)
+    os.makedirs(destination_directory, exist_ok=True)
+
+    def sync_file(file: str):
+        source = os.path.join(source_directory, file)
+        destination = os.path.join(destination_directory, file)
+        if is_unchanged(source, destination, checksum):
+            return False
+        copy_file(source, destination, link=link)
+        return True
+
+    # Copies are I/O bound, so threads overlap them well. Imported here since
+    # concurrent.futures pulls in logging, which render-one never needs.
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor() as executor:
+        copied = sum(executor.map(sync_file, files))
+
+    removed = 0
+    current = set(files)
+    for file in previous_files:
+        destination = os.path.join(destination_directory, file)
+        if file in current or not os.path.exists(destination):
+            continue
+        remove_output(destination, destination_directory)
+        removed += 1
+
+    counts = {"copied": copied, "unchanged": len(files) - copied, "removed": removed}
+    return files, counts
+
+
+def remove_output(path: str, root: str):
+    os.remove(path)
+
+    # Drop directories left empty, but never the output root itself
+    directory = os.path.dirname(path)
+    while os.path.abspath(directory) != os.path.abspath(root):
+        if os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
@@ -0,0 +1,88 @@
+import re
+
+from assets import minify_html, rewrite_asset_urls
+from urls import URL_ATTRIBUTE_PATTERN, rewrite_url
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class Template:
+    def __init__(
+        self, parts: list, slots: list, assets: dict = None, minify: bool = False
+    ):
+        self.parts = parts
+        self.slots = slots
+        # Fingerprinted asset URLs and HTML minification, already applied to
+        # the parts; process applies them to rendered content
+        self.assets = assets or {}
+        self.minify = minify
+
+    def process(self, html: str):
+        if self.assets:
+            html = rewrite_asset_urls(html, self.assets)
+        if self.minify:
+            html = minify_html(html)
+        return html
+
+    def render(self, **values):
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            if name in values:
+                parts[index] = values[name]
+        return "".join(parts)
+
+    def iter_render(self, **values):
+        # Values may be strings or iterables of string chunks, such as the
+        # output of iter_html, which are streamed through without joining
+        slots = dict(self.slots)
+        for index, part in enumerate(self.parts):
+            value = values.get(slots[index], part) if index in slots else part
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def __repr__(self):
+        return f"Template(slots: {[name for _, name in self.slots]})"
+
+
+def compile_template(
+    source: str, basepath: str = "/", assets: dict = None, minify: bool = False
+):
+    assets = assets or {}
+
+    def rewrite_attribute(match):
+        url = rewrite_url(match.group(2), basepath)
+        return f'{match.group(1)}="{assets.get(url, url)}"'
+
+    parts = []
+    slots = []
+    position = 0
+
+    for match in PLACEHOLDER_PATTERN.finditer(source):
+        literal = source[position : match.start()]
+        literal = URL_ATTRIBUTE_PATTERN.sub(rewrite_attribute, literal)
+        parts.append(minify_html(literal) if minify else literal)
+        slots.append((len(parts), match.group(1)))
+        # The raw placeholder stays in place until a value is supplied
+        parts.append(match.group(0))
+        position = match.end()
+
+    literal = URL_ATTRIBUTE_PATTERN.sub(rewrite_attribute, source[position:])
+    parts.append(minify_html(literal) if minify else literal)
+
+    return Template(parts, slots, assets, minify)
+
+
+def asset_urls(records: dict, basepath: str):
+    return {
+        rewrite_url(f"/{file}", basepath): rewrite_url(f"/{record['output']}", basepath)
+        for file, record in records.items()
+    }
+
+
+def load_template(
+    template_path: str, basepath: str = "/", assets: dict = None, minify: bool = False
+):
+    with open(template_path, "r") as html_file:
+        return compile_template(html_file.read(), basepath, assets, minify)
@@ -0,0 +1,97 @@
+import os
+import unittest
+
+from assets import build_assets, minify_css, minify_html, rewrite_asset_urls
+from fixtures import SiteTestCase
+from template import asset_urls, compile_template
+
+
+class TestMinify(unittest.TestCase):
+    def test_minify_css(self):
+        css = """
+/* theme */
+h1,
+h2 > b {
+  color: #fff;
+  margin: 0 auto;
+}
+
+a :hover { content: "  a ; b  "; }
+@media (max-width: 600px) {
+  p { width: calc(100% - 2px) }
+}
+"""
+        self.assertEqual(
+            minify_css(css),
+            'h1,h2>b{color:#fff;margin:0 auto}a :hover{content:"  a ; b  "}'
+            "@media (max-width: 600px){p{width:calc(100% - 2px)}}",
+        )
+
+    def test_minify_html(self):
+        html = (
+            "<head>\n    <title>x</title>\n  </head>\n"
+            "<p>a   <b>b</b>\n  c</p><pre>  keep\n    this</pre>\n\n<p>d  </p>"
+        )
+        self.assertEqual(
+            minify_html(html),
+            "<head>\n<title>x</title>\n</head>\n"
+            "<p>a <b>b</b>\nc</p><pre>  keep\n    this</pre>\n<p>d </p>",
+        )
+
+
+class TestAssets(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = f"{self.root}/static"
+        self.docs = f"{self.root}/docs"
+        self.write("static/css/site.css", "body {\n  margin: 0;\n}\n")
+
+    def build(self, previous=None):
+        return build_assets(
+            self.static, self.docs, cache_dir=f"{self.root}/cache", previous=previous
+        )
+
+    def test_fingerprinted_output(self):
+        records, processed = self.build()
+
+        self.assertEqual(processed, 1)
+        output = records["css/site.css"]["output"]
+        self.assertRegex(output, r"^css/site\.[0-9a-f]{12}\.css$")
+        self.assertEqual(self.read(f"docs/{output}"), "body{margin:0}")
+        self.assertEqual(
+            asset_urls(records, "/site/"), {"/site/css/site.css": f"/site/{output}"}
+        )
+
+    def test_unchanged_assets_are_skipped(self):
+        records, _ = self.build()
+        old_output = records["css/site.css"]["output"]
+
+        _, processed = self.build(records)
+        self.assertEqual(processed, 0)
+
+        self.write("static/css/site.css", "body { margin: 1px; }")
+        records, processed = self.build(records)
+        self.assertEqual(processed, 1)
+        self.assertNotEqual(records["css/site.css"]["output"], old_output)
+        self.assertFalse(os.path.exists(f"{self.docs}/{old_output}"))
+
+    def test_rewrite_references(self):
+        assets = {"/site/index.css": "/site/index.abc.css"}
+        template = compile_template(
+            '<link href="/index.css" /><a href="/index.css?x">{{ Content }}</a>',
+            basepath="/site/",
+            assets=assets,
+        )
+        self.assertEqual(
+            template.render(Content="x"),
+            '<link href="/site/index.abc.css" /><a href="/site/index.css?x">x</a>',
+        )
+        self.assertEqual(
+            rewrite_asset_urls('<a href="/site/index.css">css</a>', assets),
+            '<a href="/site/index.abc.css">css</a>',
+        )
+        self.assertEqual(template.process("<p>no assets</p>"), "<p>no assets</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
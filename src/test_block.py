@@ -1,6 +1,18 @@
+import io
+import random
 import unittest
 
-from block import BlockType, block_to_block_type, markdown_to_html_node, extract_title
+from block import (
+    BlockType,
+    analyze_markdown,
+    block_to_block_type,
+    extract_title,
+    iter_blocks,
+    lines_to_html_node,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    markdown_to_lines,
+)
 
 
 class TestBlock(unittest.TestCase):
@@ -103,6 +115,35 @@ Paragraph with **bold** text
         self.assertEqual(markdown_to_html_node(md).to_html(), expected)
 
 
+class TestStreamingBlocks(unittest.TestCase):
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        pieces = ["a", " ", "\n", "\n\n", " \n", "\t", "# ", "- ", "1. ", "> ", "```"]
+        rng = random.Random(0)
+        for _ in range(5000):
+            md = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 16)))
+            blocks = ["\n".join(lines) for lines in iter_blocks(markdown_to_lines(md))]
+            self.assertEqual(blocks, markdown_to_blocks(md), repr(md))
+
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "# Title\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter_blocks(lines())), ["# Title"])
+
+    def test_lines_to_html_node_from_file(self):
+        md = "# Title\n\n1. One\n2. Two\n\n> Quote\n"
+        html = lines_to_html_node(io.StringIO(md)).to_html()
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+        self.assertTrue(html.startswith("<div><h1>Title</h1><ol><li>One</li>"))
+
+    def test_ordered_list_numbering(self):
+        self.assertEqual(block_to_block_type("1. a\n2. b"), BlockType.ORDERED_LIST)
+        self.assertEqual(block_to_block_type("1. a\n3. b"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("01. a"), BlockType.PARAGRAPH)
+
+
 class TestExtractTitle(unittest.TestCase):
     def test_valid_title(self):
         md = """# My Awesome Title
@@ -165,5 +206,40 @@ Some content"""
         self.assertEqual(extract_title(md), "Actual Title")
 
 
+class TestAnalyzeMarkdown(unittest.TestCase):
+    def test_metadata(self):
+        md = """Intro with **bold**
+text.
+
+# Title
+
+## First section
+
+More text
+
+### Deeper"""
+        document = analyze_markdown(md)
+        self.assertEqual(document.title, "Title")
+        self.assertEqual(
+            document.headings,
+            [(1, "Title"), (2, "First section"), (3, "Deeper")],
+        )
+        self.assertEqual(document.summary, "Intro with bold text.")
+
+    def test_summary_skips_link_only_paragraphs(self):
+        md = "# Title\n\n[< Back](/)\n\n![cover](/a.png)\n\nThe [real](/x) intro"
+        self.assertEqual(analyze_markdown(md).summary, "The real intro")
+
+    def test_node_matches_markdown_to_html_node(self):
+        md = "# Title\n\n- one\n- two\n\n```\ncode\n```"
+        self.assertEqual(
+            analyze_markdown(md).node.to_html(), markdown_to_html_node(md).to_html()
+        )
+
+    def test_title_errors(self):
+        with self.assertRaises(ValueError):
+            analyze_markdown("## Not a title").title
+
+
 if __name__ == "__main__":
     unittest.main()
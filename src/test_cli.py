@@ -0,0 +1,67 @@
+import contextlib
+import io
+import unittest
+
+from cli import create_parser, main, parse_render_one, run_build
+from fixtures import SiteTestCase
+
+
+class TestCli(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/blog/post.md", "# Post\n\nSome **bold** text")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+
+    def render_one(self, *args):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(
+                [
+                    "render-one",
+                    f"{self.root}/content/blog/post.md",
+                    "--content-dir",
+                    f"{self.root}/content",
+                    "--dest-dir",
+                    f"{self.root}/docs",
+                    "--template",
+                    f"{self.root}/template.html",
+                    "--manifest",
+                    f"{self.root}/.cache/manifest.json",
+                    *args,
+                ]
+            )
+        return output.getvalue()
+
+    def test_render_one(self):
+        self.assertIn("Rendered", self.render_one())
+
+        self.assertEqual(
+            self.read("docs/blog/post.html"),
+            "<title>Post</title><div><h1>Post</h1><p>Some <b>bold</b> text</p></div>",
+        )
+
+    def test_parse_commands(self):
+        args = create_parser().parse_args(["build", "/site/", "--incremental"])
+        self.assertIs(args.run, run_build)
+        self.assertEqual(args.basepath, "/site/")
+
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            create_parser().parse_args(["nope"])
+
+    def test_parse_render_one_matches_argparse(self):
+        for argv in (
+            ["post.md"],
+            ["post.md", "/site/", "--minify-html", "--dest=out.html"],
+            ["--template", "t.html", "post.md", "--content-dir", "pages"],
+        ):
+            expected = vars(create_parser().parse_args(["render-one", *argv]))
+            del expected["command"]
+            self.assertEqual(vars(parse_render_one(argv)), expected)
+
+        # Left to argparse, for its help text and error messages
+        for argv in ([], ["-h"], ["post.md", "--temp", "t.html"], ["a", "b", "c"]):
+            self.assertIsNone(parse_render_one(argv))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import gzip
+import os
+import unittest
+
+from compress import compress_outputs, load_brotli, sibling_paths
+from fixtures import SiteTestCase
+
+
+class TestCompress(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = self.root
+        self.write("index.html", "<p>hello</p>\n" * 100)
+        self.write("tiny.css", "a{}")
+        self.write("logo.png", "not text")
+
+    def compress(self, previous=None, enabled=True):
+        files = ["index.html", "tiny.css", "logo.png"]
+        return compress_outputs(self.docs, files, previous, enabled=enabled)
+
+    def test_siblings_are_written(self):
+        records, counts = self.compress()
+
+        self.assertEqual(list(records), ["index.html", "tiny.css"])
+        self.assertEqual(counts["compressed"], 2)
+        with gzip.open(f"{self.docs}/index.html.gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>hello</p>\n" * 100)
+        # Compressing a tiny file makes it bigger, so it gets no sibling
+        self.assertFalse(os.path.exists(f"{self.docs}/tiny.css.gz"))
+        self.assertIn("index.html.gz", sibling_paths(records))
+        self.assertNotIn("tiny.css.gz", sibling_paths(records))
+
+    def test_unchanged_files_are_skipped(self):
+        records, _ = self.compress()
+
+        _, counts = self.compress(records)
+        self.assertEqual(counts["compressed"], 0)
+
+        # Rewritten with the same content
+        self.write("index.html", "<p>hello</p>\n" * 100)
+        _, counts = self.compress(records)
+        self.assertEqual(counts["compressed"], 0)
+
+        self.write("index.html", "<p>changed</p>\n" * 100)
+        _, counts = self.compress(records)
+        self.assertEqual(counts["compressed"], 1)
+        with gzip.open(f"{self.docs}/index.html.gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>changed</p>\n" * 100)
+
+    def test_stale_siblings_are_removed(self):
+        records, _ = self.compress()
+
+        compress_outputs(self.docs, ["tiny.css"], records)
+        self.assertFalse(os.path.exists(f"{self.docs}/index.html.gz"))
+
+        records, _ = self.compress()
+        records, counts = self.compress(records, enabled=False)
+        self.assertEqual(records, {})
+        self.assertEqual(counts["compressed"], 0)
+        self.assertFalse(os.path.exists(f"{self.docs}/index.html.gz"))
+
+    @unittest.skipIf(load_brotli() is None, "brotli is not installed")
+    def test_brotli(self):
+        records, _ = self.compress()
+
+        self.assertIn("br", records["index.html"]["saved"])
+        self.assertTrue(os.path.exists(f"{self.docs}/index.html.br"))
+
+
+if __name__ == "__main__":
+    unittest.main()
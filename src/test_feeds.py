@@ -0,0 +1,110 @@
+import os
+import unittest
+
+from feeds import blog_posts, path_url
+from fixtures import SiteTestCase
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestSiteFiles(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(f"{self.root}/static")
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\n[blog](/blog/)")
+        for i in range(3):
+            self.write_post(i, f"# Post {i}\n\nAbout **post** {i}.\n\nMore")
+
+    def write_post(self, i, text):
+        path = f"content/blog/post{i}/index.md"
+        self.write(path, text)
+        os.utime(self.path(path), (1000000000 + i, 1000000000 + i))
+
+    def build(self, **kwargs):
+        return super().build(
+            basepath="/site/",
+            site_url="https://example.com",
+            posts_per_page=2,
+            **kwargs,
+        )
+
+    def test_path_url(self):
+        self.assertEqual(path_url("index.html", "/site/"), "/site/")
+        self.assertEqual(path_url("blog/a/index.html", "/"), "/blog/a/")
+        self.assertEqual(path_url("feed.xml", "/site/"), "/site/feed.xml")
+
+    def test_listing_pages(self):
+        manifest = self.build()
+
+        self.assertEqual(
+            sorted(manifest["generated"]),
+            ["blog/index.html", "blog/page/2/index.html", "feed.xml", "sitemap.xml"],
+        )
+        first = self.read("docs/blog/index.html")
+        self.assertIn(
+            '<a href="/site/blog/post2/">Post 2</a></h2><p>About post 2.</p>', first
+        )
+        self.assertIn("Post 1", first)
+        self.assertNotIn("Post 0", first)
+        self.assertIn('<a href="/site/blog/page/2/">Older posts</a>', first)
+        second = self.read("docs/blog/page/2/index.html")
+        self.assertIn("Post 0", second)
+        self.assertIn('<a href="/site/blog/">Newer posts</a>', second)
+
+    def test_sitemap_and_feed(self):
+        self.build()
+
+        sitemap = self.read("docs/sitemap.xml")
+        self.assertIn(
+            "<url><loc>https://example.com/site/blog/post0/</loc>"
+            "<lastmod>2001-09-09</lastmod></url>",
+            sitemap,
+        )
+        self.assertIn("<loc>https://example.com/site/blog/page/2/</loc>", sitemap)
+        feed = self.read("docs/feed.xml")
+        self.assertIn("<updated>2001-09-09T01:46:42Z</updated>", feed)
+        self.assertLess(feed.index("Post 2"), feed.index("Post 0"))
+        self.assertIn("<summary>About post 0.</summary>", feed)
+        self.assertIn("<author><name>Blog</name></author>", feed)
+
+    def test_feed_author(self):
+        self.build(feed_author="Ada & Co")
+
+        feed = self.read("docs/feed.xml")
+        self.assertIn("<author><name>Ada &amp; Co</name></author>", feed)
+
+    def test_incremental_updates(self):
+        manifest = self.build()
+        self.write_post(1, "# Renamed & moved\n\nNew summary")
+        os.remove(f"{self.root}/content/blog/post0/index.md")
+
+        manifest = self.build(incremental=True)
+
+        posts = blog_posts(manifest["pages"], f"{self.root}/docs", "/", "blog")
+        titles = [post["title"] for post in posts]
+        self.assertEqual(titles, ["Post 2", "Renamed & moved"])
+        self.assertIn("Renamed &amp; moved", self.read("docs/blog/index.html"))
+        self.assertFalse(os.path.exists(f"{self.root}/docs/blog/page"))
+        self.assertNotIn("blog/page/2/index.html", manifest["generated"])
+
+    def test_hand_written_index_wins(self):
+        self.write("content/blog/index.md", "# My blog")
+
+        manifest = self.build()
+
+        self.assertNotIn("blog/index.html", manifest["generated"])
+        self.assertIn("My blog", self.read("docs/blog/index.html"))
+
+    def test_hand_written_index_replaces_listing(self):
+        self.build()
+        self.write("content/blog/index.md", "# My blog")
+
+        manifest = self.build()
+
+        self.assertNotIn("blog/index.html", manifest["generated"])
+        self.assertIn("My blog", self.read("docs/blog/index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
 import unittest
 
-from html_node import HTMLNode, LeafNode, ParentNode
+from html_node import (
+    HTMLNode,
+    LeafNode,
+    ParentNode,
+    RawNode,
+    iter_html,
+)
 
 # from textnode import TextNode, TextType
 
@@ -28,6 +34,14 @@ class TestLeafNode(unittest.TestCase):
         self.assertEqual(node2, "<p>Hello world</p>")
         self.assertEqual(node3, '<a href="www.hello.world.com">Hello world</a>')
 
+    def test_slots(self):
+        node = LeafNode(tag="b", value="Hello world")
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(
+            (node.tag, node.value, node.children, node.props),
+            ("b", "Hello world", None, None),
+        )
+
 
 class TestParentNode(unittest.TestCase):
     def test_to_html(self):
@@ -48,5 +62,75 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(node, expected_html)
 
 
+class TestStreamingHTML(unittest.TestCase):
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("ul", [ParentNode("li", [LeafNode("a", "b")])]),
+                LeafNode("Text"),
+                ParentNode("p", [LeafNode("Nested", "i")]),
+            ],
+            {"class": "page"},
+        )
+        html = "".join(iter_html(node))
+        self.assertEqual(html, node.to_html())
+        self.assertEqual(
+            html,
+            '<div class="page"><ul><li><b>a</b></li></ul>'
+            "Text<p><i>Nested</i></p></div>",
+        )
+
+    def test_deep_tree(self):
+        node = LeafNode("leaf")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = "".join(iter_html(node))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + len("leaf"))
+
+    def test_invalid_nodes(self):
+        with self.assertRaises(ValueError):
+            list(iter_html(ParentNode("div", None)))
+        with self.assertRaises(ValueError):
+            list(iter_html(ParentNode("div", [LeafNode(None, "b")])))
+
+
+class TestEscaping(unittest.TestCase):
+    def test_text(self):
+        node = LeafNode("a < b && c > d", "code")
+        self.assertEqual(node.to_html(), "<code>a &lt; b &amp;&amp; c &gt; d</code>")
+        self.assertEqual(LeafNode("plain").to_html(), "plain")
+
+    def test_attributes(self):
+        node = LeafNode("x", "a", {"href": '/search?q="a"&b=<c>'})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/search?q=&quot;a&quot;&amp;b=&lt;c&gt;">x</a>',
+        )
+
+    def test_streaming_matches_to_html(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("1 < 2 "),
+                LeafNode("R&D", "b"),
+                LeafNode("<p>", "p"),
+                LeafNode("", "p"),
+                LeafNode("alt", "a", {"title": 'say "hi"'}),
+            ],
+        )
+        expected = (
+            '<p>1 &lt; 2 <b>R&amp;D</b>&lt;p&gt;<p></p><a title="say &quot;hi&quot;">'
+            "alt</a></p>"
+        )
+        self.assertEqual("".join(iter_html(node)), expected)
+
+    def test_raw_nodes_are_not_escaped(self):
+        node = ParentNode("div", [RawNode("<p>cached &amp; rendered</p>")])
+        self.assertEqual(
+            "".join(iter_html(node)), "<div><p>cached &amp; rendered</p></div>"
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,114 @@
+import os
+import struct
+import unittest
+import zlib
+
+from fixtures import SiteTestCase
+from images import PNG_SIGNATURE, build_images, load_pillow, png_size
+from text_node import (
+    TextNode,
+    TextType,
+    image_props,
+    image_registry,
+    text_node_to_html_node,
+)
+
+
+def png_bytes(width: int, height: int):
+    def chunk(kind: bytes, data: bytes):
+        crc = zlib.crc32(kind + data)
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    rows = b"".join(b"\0" + b"\x80\x40\x20" * width for _ in range(height))
+    return (
+        PNG_SIGNATURE
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+class TestImages(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = f"{self.root}/static"
+        os.makedirs(f"{self.static}/images")
+        self.write_png("images/wide.png", 1200, 300)
+        self.write("static/index.css", "body {}")
+
+    def write_png(self, path, width, height):
+        with open(f"{self.static}/{path}", "wb") as file:
+            file.write(png_bytes(width, height))
+
+    def build(self, previous=None):
+        return build_images(
+            self.static,
+            f"{self.root}/docs",
+            cache_dir=f"{self.root}/cache",
+            previous=previous,
+        )
+
+    def test_png_size(self):
+        self.assertEqual(png_size(f"{self.static}/images/wide.png"), (1200, 300))
+        self.assertIsNone(png_size(f"{self.static}/index.css"))
+
+    def test_unchanged_images_are_skipped(self):
+        records, processed = self.build()
+        self.assertEqual(list(records), ["images/wide.png"])
+        self.assertEqual(processed, 1)
+
+        records, processed = self.build(records)
+        self.assertEqual(processed, 0)
+
+        self.write_png("images/wide.png", 800, 300)
+        records, processed = self.build(records)
+        self.assertEqual(processed, 1)
+        self.assertEqual(records["images/wide.png"]["width"], 800)
+
+    @unittest.skipIf(load_pillow() is None, "Pillow is not installed")
+    def test_variants(self):
+        records, _ = self.build()
+
+        variants = records["images/wide.png"]["variants"]
+        self.assertEqual(
+            [variant[:2] for variant in variants],
+            [[480, "images/wide-480w.png"], [960, "images/wide-960w.png"]],
+        )
+        variant = f"{self.root}/docs/images/wide-480w.png"
+        self.assertEqual(png_size(variant), (480, 120))
+
+        os.remove(f"{self.static}/images/wide.png")
+        self.build(records)
+        self.assertFalse(os.path.exists(f"{self.root}/docs/images/wide-480w.png"))
+
+    def test_image_props(self):
+        images = {"images/a.png": (1200, 300, [[480, "images/a-480w.png"]])}
+
+        self.assertEqual(
+            image_props("/images/a.png", "/site/", images),
+            {
+                "width": 1200,
+                "height": 300,
+                "loading": "lazy",
+                "srcset": "/site/images/a-480w.png 480w, /site/images/a.png 1200w",
+                "sizes": "auto, 100vw",
+            },
+        )
+        self.assertEqual(image_props("/images/other.png", "/", images), {})
+        self.assertEqual(image_props("https://x.dev/images/a.png", "/", images), {})
+
+        node = TextNode("A", TextType.IMAGE, "/images/a.png")
+        html = text_node_to_html_node(node, "/", images).to_html()
+        self.assertIn('alt="A" width="1200" height="300" loading="lazy"', html)
+        self.assertNotIn("width", text_node_to_html_node(node).to_html())
+
+    def test_registry_only_has_measured_images(self):
+        records, _ = self.build()
+        records["images/broken.png"] = dict(records["images/wide.png"], width=None)
+
+        self.assertEqual(list(image_registry(records)), ["images/wide.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
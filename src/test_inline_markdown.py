@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from text_node import TextNode, TextType
@@ -94,5 +95,62 @@ class TestSplitDelimiter(unittest.TestCase):
         self.assertEqual(node, expected)
 
 
+def split_nodes_pipeline(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+class TestInlineScanner(unittest.TestCase):
+    def parse(self, parser, text):
+        try:
+            return parser(text)
+        except ValueError as error:
+            return str(error)
+
+    def test_matches_split_nodes_pipeline(self):
+        pieces = ["a", " ", "i", "*", "**", "`", "[x](y)", "![i](u)", "[", "](", ")"]
+        rng = random.Random(0)
+        for _ in range(5000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(
+                self.parse(text_to_text_nodes, text),
+                self.parse(split_nodes_pipeline, text),
+                text,
+            )
+
+    def test_unmatched_delimiters(self):
+        for text, delimiter in [
+            ("**bold", "**"),
+            ("*italic", "*"),
+            ("`code", "`"),
+            ("`a*b*c`", "`"),
+            ("`a` *b", "*"),
+        ]:
+            with self.assertRaises(ValueError) as context:
+                text_to_text_nodes(text)
+            self.assertIn(f'"{delimiter}"', str(context.exception))
+
+    def test_single_letter_segments_are_kept(self):
+        self.assertEqual(
+            text_to_text_nodes("*i* and **b**"),
+            [
+                TextNode("i", TextType.ITALIC),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("b", TextType.BOLD),
+            ],
+        )
+
+    def test_many_links(self):
+        text = " ".join(f"[link {i}](/page/{i})" for i in range(200))
+        nodes = text_to_text_nodes(text)
+        self.assertEqual(len(nodes), 399)
+        self.assertEqual(nodes[-1], TextNode("link 199", TextType.LINK, "/page/199"))
+
+
 if __name__ == "__main__":
     unittest.main()
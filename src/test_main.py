@@ -0,0 +1,148 @@
+import contextlib
+import io
+import os
+import unittest
+
+from fixtures import SiteTestCase
+from main import generate_pages_recursive
+from render import render_large_page, render_page
+from template import load_template
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class BuildTestCase(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = f"{self.root}/content"
+        self.docs = f"{self.root}/docs"
+        self.template = f"{self.root}/template.html"
+        self.write(self.template, TEMPLATE)
+        self.write(f"{self.content}/index.md", "# Home\n\nWelcome")
+        self.write(f"{self.content}/blog/post/index.md", "# Post\n\nHello")
+
+    # Renders the pages alone, without the rest of main.build, quietly
+    def build(self, manifest=None, jobs=1, io_depth=0, incremental=True):
+        with contextlib.redirect_stdout(io.StringIO()):
+            pages, self.counts = generate_pages_recursive(
+                dir_path_content=self.content,
+                template_path=self.template,
+                dest_dir_path=self.docs,
+                basepath="/",
+                manifest=manifest,
+                incremental=incremental,
+                jobs=jobs,
+                io_depth=io_depth,
+            )
+        return {"pages": pages}
+
+
+class TestIncrementalBuild(BuildTestCase):
+    def test_unchanged_pages_are_not_rewritten(self):
+        manifest = self.build()
+        index = f"{self.docs}/index.html"
+        self.write(index, "untouched")
+        self.write(f"{self.content}/blog/post/index.md", "# Post\n\nEdited")
+
+        self.build(manifest)
+
+        self.assertEqual(self.read(index), "untouched")
+        self.assertIn("Edited", self.read(f"{self.docs}/blog/post/index.html"))
+
+    def test_template_change_rebuilds_everything(self):
+        manifest = self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+
+        self.build(manifest)
+
+        self.assertTrue(self.read(f"{self.docs}/index.html").startswith("<h1>"))
+
+    def test_deleted_source_removes_output(self):
+        manifest = self.build()
+        os.remove(f"{self.content}/blog/post/index.md")
+        os.rmdir(f"{self.content}/blog/post")
+
+        manifest = self.build(manifest)
+
+        self.assertNotIn(f"{self.content}/blog/post/index.md", manifest["pages"])
+        self.assertFalse(os.path.exists(f"{self.docs}/blog"))
+        self.assertTrue(os.path.exists(f"{self.docs}/index.html"))
+
+    def test_missing_output_is_regenerated(self):
+        manifest = self.build()
+        os.remove(f"{self.docs}/index.html")
+
+        self.build(manifest)
+
+        self.assertTrue(os.path.exists(f"{self.docs}/index.html"))
+
+
+class TestOutputWrites(BuildTestCase):
+    def test_identical_output_is_not_rewritten(self):
+        manifest = self.build()
+        index = f"{self.docs}/index.html"
+        os.utime(index, ns=(0, 0))
+
+        manifest = self.build(manifest, incremental=False)
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+        self.assertEqual(self.counts, {"written": 0, "skipped": 2, "deleted": 0})
+
+        self.write(f"{self.content}/index.md", "# Home\n\nChanged")
+        self.build(manifest, incremental=False)
+        self.assertNotEqual(os.stat(index).st_mtime_ns, 0)
+        self.assertEqual(self.counts, {"written": 1, "skipped": 1, "deleted": 0})
+
+    def test_changed_file_is_rewritten_without_manifest(self):
+        self.build()
+        index = f"{self.docs}/index.html"
+        original = self.read(index)
+        self.write(index, "x" * len(original))
+
+        self.build(incremental=False)
+        self.assertEqual(self.read(index), original)
+        self.assertEqual(self.counts["written"], 1)
+
+
+class TestParallelBuild(BuildTestCase):
+    def test_parallel_output_matches_serial(self):
+        for i in range(10):
+            self.write(f"{self.content}/blog/page{i}.md", f"# Page {i}\n\n**{i}**")
+
+        self.build()
+        serial = self.outputs(self.docs)
+        self.docs = f"{self.root}/docs-parallel"
+        self.build(jobs=3)
+        parallel = self.outputs(self.docs)
+
+        self.assertEqual(len(serial), 12)
+        self.assertEqual(serial, parallel)
+
+    def test_async_output_matches_serial(self):
+        for i in range(10):
+            self.write(f"{self.content}/blog/page{i}.md", f"# Page {i}\n\n**{i}**")
+
+        self.build()
+        serial = self.outputs(self.docs)
+        self.docs = f"{self.root}/docs-async"
+        self.build(io_depth=2)
+        pipelined = self.outputs(self.docs)
+
+        self.assertEqual(serial, pipelined)
+
+
+class TestLargePages(BuildTestCase):
+    def test_streamed_output_matches_in_memory(self):
+        source = f"{self.content}/large.md"
+        self.write(source, "Intro\n\n# Large\n\n" + "- item **x**\n" * 500 + "\ntail\n")
+        template = load_template(self.template)
+
+        render_page(source, template, f"{self.root}/small.html", "/")
+        render_large_page(source, template, f"{self.root}/large.html", "/")
+
+        self.assertEqual(
+            self.read(f"{self.root}/large.html"), self.read(f"{self.root}/small.html")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
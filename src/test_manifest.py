@@ -0,0 +1,43 @@
+import json
+import os
+import tempfile
+import unittest
+
+from manifest import GENERATOR_VERSION, load_manifest, page_key, save_manifest
+
+
+class TestManifest(unittest.TestCase):
+    def test_missing_manifest_is_empty(self):
+        manifest = load_manifest("/nonexistent/manifest.json")
+        self.assertEqual(manifest["pages"], {})
+        self.assertEqual(manifest["static"], [])
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/cache/manifest.json"
+            manifest = {
+                "version": GENERATOR_VERSION,
+                "pages": {
+                    "content/index.md": {"key": "abc", "dest": "docs/index.html"}
+                },
+            }
+            save_manifest(manifest, path)
+            self.assertEqual(load_manifest(path), manifest)
+            self.assertFalse(os.path.exists(f"{path}.tmp"))
+
+    def test_other_version_is_discarded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/manifest.json"
+            with open(path, "w") as file:
+                json.dump({"version": "0", "pages": {"a": {}}}, file)
+            self.assertEqual(load_manifest(path)["pages"], {})
+
+    def test_page_key(self):
+        key = page_key("source", "template", "/")
+        self.assertEqual(key, page_key("source", "template", "/"))
+        self.assertNotEqual(key, page_key("source", "other", "/"))
+        self.assertNotEqual(key, page_key("source", "template", "/site/"))
+
+
+if __name__ == "__main__":
+    unittest.main()
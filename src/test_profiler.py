@@ -0,0 +1,42 @@
+import json
+import tempfile
+import unittest
+
+from main import render_page
+from profiler import PAGE_STAGES, Profiler, profile_page
+from template import compile_template
+
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_stages_are_exclusive(self):
+        profiler = Profiler()
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                sum(range(100000))
+        stages = profiler.build_stages
+        self.assertLess(stages["outer"]["time"], stages["inner"]["time"])
+
+    def test_profile_page(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        profiler = Profiler()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(f"{tmp}/index.md", "w") as file:
+                file.write("# Title\n\nSome **bold** [link](/a)\n\n- a\n- b")
+            render_page(f"{tmp}/index.md", template, f"{tmp}/plain.html", "/")
+            profile_page(profiler, f"{tmp}/index.md", template, f"{tmp}/page.html", "/")
+            with open(f"{tmp}/plain.html") as plain, open(f"{tmp}/page.html") as page:
+                self.assertEqual(plain.read(), page.read())
+
+            profiler.save(f"{tmp}/profile.json")
+            with open(f"{tmp}/profile.json") as file:
+                report = json.load(file)
+
+        self.assertEqual(set(report["stages"]), set(PAGE_STAGES))
+        self.assertEqual(set(report["stages"]["to_html"]), {"time", "net_blocks"})
+        self.assertEqual(report["pages"][0]["path"], f"{tmp}/index.md")
+        self.assertIn(f"{tmp}/index.md", profiler.summary(top=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
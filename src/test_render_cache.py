@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+
+from block import analyze_markdown, markdown_to_html_node
+from html_node import RawNode
+from render_cache import BlockCache
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "/", "<p>a</p>")
+        cache.put("b", "/", "<p>b</p>")
+        cache.get("a", "/")
+        cache.put("c", "/", "<p>c</p>")
+
+        self.assertEqual(cache.get("a", "/"), "<p>a</p>")
+        self.assertIsNone(cache.get("b", "/"))
+        self.assertEqual(cache.counts(), {"hits": 2, "disk_hits": 0, "misses": 1})
+
+    def test_basepath_is_part_of_the_key(self):
+        cache = BlockCache()
+        cache.put("[x](/a)", "/", '<p><a href="/a">x</a></p>')
+        self.assertIsNone(cache.get("[x](/a)", "/site/"))
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            BlockCache(directory=tmp).put("a", "/", "<p>a</p>")
+            cache = BlockCache(directory=tmp)
+            self.assertEqual(cache.get("a", "/"), "<p>a</p>")
+            self.assertEqual(cache.get("a", "/"), "<p>a</p>")
+            self.assertEqual(cache.counts(), {"hits": 1, "disk_hits": 1, "misses": 0})
+
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n\nShared **note**\n\n- [a](/a)\n- b\n\nShared **note**"
+        cache = BlockCache()
+        node = markdown_to_html_node(md, cache=cache)
+        # Misses are rendered once and handed on as the cached markup
+        self.assertTrue(all(type(child) is RawNode for child in node.children))
+        first = node.to_html()
+        second = markdown_to_html_node(md, cache=cache).to_html()
+
+        self.assertEqual(first, markdown_to_html_node(md).to_html())
+        self.assertEqual(second, first)
+        self.assertEqual(cache.counts(), {"hits": 5, "disk_hits": 0, "misses": 3})
+
+    def test_hits_keep_links(self):
+        md = "# Title\n\n[a](/a) and ![b](/b.png)"
+        with tempfile.TemporaryDirectory() as tmp:
+            first = analyze_markdown(md, cache=BlockCache(directory=tmp))
+            second = analyze_markdown(md, cache=BlockCache(directory=tmp))
+
+        self.assertEqual(first.links, ["/a", "/b.png"])
+        self.assertEqual(second.links, first.links)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import os
+import unittest
+
+from fixtures import SiteTestCase
+from manifest import load_manifest, save_manifest
+from shard import assign_shards, merge_shards, shard_manifest_path
+
+
+class TestAssignShards(unittest.TestCase):
+    def test_balanced_and_deterministic(self):
+        pages = [(f"content/page{i}.md", 1000 * (i % 7)) for i in range(50)]
+        shards = assign_shards(pages, 4)
+
+        self.assertEqual(shards, assign_shards(list(reversed(pages)), 4))
+        self.assertEqual(set(shards.values()), {1, 2, 3, 4})
+        loads = [0] * 4
+        for source, size in pages:
+            loads[shards[source] - 1] += size
+        self.assertLess(max(loads) - min(loads), 7000)
+
+
+class TestMergeShards(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(8):
+            self.write(f"content/section{i % 3}/page{i}.md", f"# Page {i}\n\n[home](/)")
+
+    def merge(self, basepath="/"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            merge_shards(
+                f"{self.root}/shards",
+                basepath=basepath,
+                static_dir=f"{self.root}/static",
+                template_path=f"{self.root}/template.html",
+                dest_dir=f"{self.root}/merged",
+                manifest_path=f"{self.root}/merged.json",
+            )
+
+    def build_shards(self, count):
+        for index in range(1, count + 1):
+            self.build(shard=(index, count))
+
+    def test_merged_output_matches_full_build(self):
+        self.build()
+        self.build_shards(3)
+        self.merge()
+
+        self.assertEqual(self.outputs("merged"), self.outputs("docs"))
+        self.assertEqual(len(load_manifest(f"{self.root}/merged.json")["pages"]), 8)
+
+    def test_missing_shard(self):
+        self.build_shards(3)
+        os.remove(shard_manifest_path(f"{self.root}/shards", 2))
+        with self.assertRaisesRegex(ValueError, "Expected shards"):
+            self.merge()
+
+    def test_missing_page(self):
+        self.build_shards(2)
+        path = shard_manifest_path(f"{self.root}/shards", 1)
+        manifest = load_manifest(path)
+        manifest["pages"].popitem()
+        save_manifest(manifest, path)
+        with self.assertRaisesRegex(ValueError, "the site has 8"):
+            self.merge()
+
+    def test_duplicate_page(self):
+        self.build_shards(2)
+        first = load_manifest(shard_manifest_path(f"{self.root}/shards", 1))
+        path = shard_manifest_path(f"{self.root}/shards", 2)
+        second = load_manifest(path)
+        second["pages"].update(list(first["pages"].items())[:1])
+        save_manifest(second, path)
+        with self.assertRaisesRegex(ValueError, "more than one shard"):
+            self.merge()
+
+    def test_basepath_mismatch(self):
+        self.build_shards(2)
+        with self.assertRaisesRegex(ValueError, "basepath '/', not '/x/'"):
+            self.merge("/x/")
+
+        self.build(basepath="/x/", shard=(2, 2))
+        with self.assertRaisesRegex(ValueError, "different basepaths"):
+            self.merge("/x/")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import unittest
+
+from fixtures import SiteTestCase
+from static_sync import sync_directory
+
+
+class TestStaticSync(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = f"{self.root}/static"
+        self.docs = f"{self.root}/docs"
+        self.write(f"{self.static}/index.css", "body {}")
+        self.write(f"{self.static}/images/a.png", "png")
+
+    def test_initial_sync_copies_everything(self):
+        files, counts = sync_directory(self.static, self.docs)
+        self.assertEqual(files, ["index.css", "images/a.png"])
+        self.assertEqual(counts, {"copied": 2, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.read(f"{self.docs}/images/a.png"), "png")
+
+    def test_only_changed_files_are_copied(self):
+        sync_directory(self.static, self.docs)
+        self.write(f"{self.static}/index.css", "body { color: red }")
+
+        _, counts = sync_directory(self.static, self.docs)
+
+        self.assertEqual(counts, {"copied": 1, "unchanged": 1, "removed": 0})
+        self.assertEqual(self.read(f"{self.docs}/index.css"), "body { color: red }")
+
+    def test_checksum_skips_touched_files(self):
+        sync_directory(self.static, self.docs)
+        os.utime(f"{self.static}/index.css", (0, 0))
+
+        _, plain = sync_directory(self.static, self.docs)
+        os.utime(f"{self.static}/index.css", (1, 1))
+        _, checked = sync_directory(self.static, self.docs, checksum=True)
+
+        self.assertEqual(plain["copied"], 1)
+        self.assertEqual(checked["copied"], 0)
+
+    def test_stale_files_are_removed(self):
+        files, _ = sync_directory(self.static, self.docs)
+        self.write(f"{self.docs}/index.html", "page")
+        os.remove(f"{self.static}/images/a.png")
+
+        _, counts = sync_directory(self.static, self.docs, previous_files=files)
+
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(os.path.exists(f"{self.docs}/images"))
+        self.assertTrue(os.path.exists(f"{self.docs}/index.html"))
+
+    def test_link(self):
+        sync_directory(self.static, self.docs, link=True)
+        self.assertTrue(
+            os.path.samefile(f"{self.static}/index.css", f"{self.docs}/index.css")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
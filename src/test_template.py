@@ -0,0 +1,51 @@
+import unittest
+
+from template import compile_template
+from urls import rewrite_url
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = compile_template("<title>{{ Title }}</title><p>{{ Content }}</p>")
+        html = template.render(Title="Hello", Content="<b>world</b>")
+        self.assertEqual(html, "<title>Hello</title><p><b>world</b></p>")
+
+    def test_values_are_not_rescanned(self):
+        template = compile_template("<a>{{ Title }}</a>{{ Content }}")
+        html = template.render(Title="{{ Content }}", Content='<a href="/x">x</a>')
+        self.assertEqual(html, '<a>{{ Content }}</a><a href="/x">x</a>')
+
+    def test_iter_render_streams_chunks(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}!")
+        chunks = template.iter_render(Title="Hi", Content=iter(["<p>", "c", "</p>"]))
+        self.assertEqual("".join(chunks), "<title>Hi</title><p>c</p>!")
+
+    def test_unknown_placeholder_is_left_alone(self):
+        template = compile_template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render(Title="Hi"), "Hi {{ Author }}")
+
+    def test_basepath_applied_to_template_attributes(self):
+        template = compile_template(
+            '<link href="/index.css" /><a href="https://boot.dev">x</a>',
+            basepath="/site/",
+        )
+        self.assertEqual(
+            template.render(),
+            '<link href="/site/index.css" /><a href="https://boot.dev">x</a>',
+        )
+
+
+class TestRewriteUrl(unittest.TestCase):
+    def test_rewrite_url(self):
+        self.assertEqual(rewrite_url("/images/a.png", "/site/"), "/site/images/a.png")
+        self.assertEqual(rewrite_url("/", "/site/"), "/site/")
+        self.assertEqual(rewrite_url("/contact", "/"), "/contact")
+        self.assertEqual(rewrite_url("https://boot.dev", "/site/"), "https://boot.dev")
+        self.assertEqual(
+            rewrite_url("//cdn.example.com/a", "/site/"), "//cdn.example.com/a"
+        )
+        self.assertEqual(rewrite_url("page.html", "/site/"), "page.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,12 @@ class TestTextNode(unittest.TestCase):
         self.assertNotEqual(node, node3)
         self.assertEqual(node3, node4)
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.other = "value"
+
     def test_text_node_to_html_node(self):
         node = text_node_to_html_node(
             TextNode("Hello", TextType.IMAGE, "www.example.com")
@@ -20,6 +26,16 @@ class TestTextNode(unittest.TestCase):
         expected_html = '<img src="www.example.com" alt="Hello"></img>'
         self.assertEqual(node, expected_html)
 
+    def test_text_node_to_html_node_basepath(self):
+        link = text_node_to_html_node(
+            TextNode("Home", TextType.LINK, "/blog"), basepath="/site/"
+        ).to_html()
+        external = text_node_to_html_node(
+            TextNode("Boot", TextType.LINK, "https://boot.dev"), basepath="/site/"
+        ).to_html()
+        self.assertEqual(link, '<a href="/site/blog">Home</a>')
+        self.assertEqual(external, '<a href="https://boot.dev">Boot</a>')
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from urls import find_broken_links, link_target, rewrite_url
+
+
+class TestUrls(unittest.TestCase):
+    def test_rewrite_url(self):
+        self.assertEqual(rewrite_url("/a", "/site/"), "/site/a")
+        self.assertEqual(rewrite_url("https://x.dev/a", "/site/"), "https://x.dev/a")
+        self.assertEqual(rewrite_url("a", "/site/"), "a")
+
+    def test_link_target(self):
+        page = "blog/post/index.html"
+        self.assertEqual(link_target("/", page), "")
+        self.assertEqual(link_target("/blog/", page), "blog/")
+        self.assertEqual(link_target("/img/a.png?v=1#x", page), "img/a.png")
+        self.assertEqual(link_target("../other", page), "blog/other")
+        self.assertEqual(link_target("a.png", page), "blog/post/a.png")
+        self.assertIsNone(link_target("https://x.dev/a", page))
+        self.assertIsNone(link_target("//x.dev/a", page))
+        self.assertIsNone(link_target("mailto:a@x.dev", page))
+        self.assertIsNone(link_target("#top", page))
+
+    def test_find_broken_links(self):
+        pages = {
+            "content/index.md": {
+                "dest": "docs/index.html",
+                "links": ["/blog/post", "/blog/missing", "/img/a.png", "/img/b.png"],
+            },
+            "content/blog/post/index.md": {
+                "dest": "docs/blog/post/index.html",
+                "links": ["/", "../../", "https://x.dev"],
+            },
+        }
+        self.assertEqual(
+            find_broken_links(pages, ["img/a.png"], "docs"),
+            [
+                ("content/index.md", "/blog/missing"),
+                ("content/index.md", "/img/b.png"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
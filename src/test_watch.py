@@ -0,0 +1,68 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from fixtures import SiteTestCase
+from watch import PollingWatcher, SiteWatcher
+
+
+class TestSiteWatcher(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/index.md", "# Blog")
+        self.write("static/index.css", "body {}")
+        self.site = SiteWatcher(
+            content_dir=f"{self.root}/content",
+            static_dir=f"{self.root}/static",
+            template_path=f"{self.root}/template.html",
+            dest_dir=f"{self.root}/docs",
+            manifest_path=f"{self.root}/.cache/manifest.json",
+        )
+        self.handle(None)
+
+    def handle(self, changes):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            if changes is None:
+                self.site.build()
+            else:
+                self.site.handle({self.path(name) for name in changes})
+        return output.getvalue()
+
+    def test_markdown_edit_renders_one_page(self):
+        self.write("content/blog/index.md", "# Blog\n\nNew post")
+        output = self.handle(["content/blog/index.md"])
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertIn("New post", self.read("docs/blog/index.html"))
+
+    def test_deleted_sources_remove_outputs(self):
+        os.remove(self.path("content/blog/index.md"))
+        os.remove(self.path("static/index.css"))
+        self.handle(["content/blog/index.md", "static/index.css"])
+        self.assertFalse(os.path.exists(self.path("docs/blog")))
+        self.assertFalse(os.path.exists(self.path("docs/index.css")))
+
+    def test_template_change_rebuilds_everything(self):
+        self.write("template.html", "<h1>{{ Title }}</h1>")
+        output = self.handle(["template.html"])
+        self.assertEqual(output.count("Generating page"), 2)
+        self.assertEqual(self.read("docs/index.html"), "<h1>Home</h1>")
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def test_detects_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(f"{tmp}/a.md", "w") as file:
+                file.write("a")
+            watcher = PollingWatcher(trees=[tmp], files=[])
+            with open(f"{tmp}/b.md", "w") as file:
+                file.write("b")
+            os.remove(f"{tmp}/a.md")
+            self.assertEqual(watcher.wait(timeout=1), {f"{tmp}/a.md", f"{tmp}/b.md"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
 from enum import Enum
 
 from html_node import LeafNode
+from urls import rewrite_url
+
+# sizes attribute of images with variants
+IMAGE_SIZES = "auto, 100vw"
 
 
 class TextType(Enum):
@@ -14,6 +18,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str = None):
         self.text = text
         self.text_type = text_type
@@ -35,20 +41,90 @@ class TextNode:
         return f"TextNode({text}{text_type}{url})"
 
 
-def text_node_to_html_node(text_node: TextNode):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(value=text_node.text)
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode(tag="b", value=text_node.text)
-    elif text_node.text_type == TextType.ITALIC:
-        return LeafNode(tag="i", value=text_node.text)
-    elif text_node.text_type == TextType.CODE:
-        return LeafNode(tag="code", value=text_node.text)
-    elif text_node.text_type == TextType.LINK:
-        return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
-        return LeafNode(
-            tag="img", value="", props={"src": text_node.url, "alt": text_node.text}
-        )
-    else:
+def text_to_leaf(text_node: TextNode, basepath: str, images: dict):
+    return LeafNode(value=text_node.text)
+
+
+def bold_to_leaf(text_node: TextNode, basepath: str, images: dict):
+    return LeafNode(tag="b", value=text_node.text)
+
+
+def italic_to_leaf(text_node: TextNode, basepath: str, images: dict):
+    return LeafNode(tag="i", value=text_node.text)
+
+
+def code_to_leaf(text_node: TextNode, basepath: str, images: dict):
+    return LeafNode(tag="code", value=text_node.text)
+
+
+def link_to_leaf(text_node: TextNode, basepath: str, images: dict):
+    return LeafNode(
+        tag="a",
+        value=text_node.text,
+        props={"href": rewrite_url(text_node.url, basepath)},
+    )
+
+
+def image_registry(records: dict):
+    registry = {}
+    for file, record in records.items():
+        if record["width"] is not None:
+            variants = [variant[:2] for variant in record["variants"]]
+            registry[file] = (record["width"], record["height"], variants)
+    return registry
+
+
+def image_props(url: str, basepath: str, images: dict):
+    # Extra attributes for an image leaf. images maps the site path of every
+    # measured image to (width, height, [(variant width, site path)]), see
+    # image_registry; other images get none.
+    if not images:
+        return {}
+    # Imported here: without images, rendering never needs urllib.parse
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path.startswith("/"):
+        return {}
+    image = images.get(parts.path.lstrip("/"))
+    if image is None:
+        return {}
+
+    width, height, variants = image
+    props = {"width": width, "height": height, "loading": "lazy"}
+    if variants:
+        srcset = [
+            f"{rewrite_url('/' + output, basepath)} {variant_width}w"
+            for variant_width, output in variants
+        ]
+        srcset.append(f"{rewrite_url(url, basepath)} {width}w")
+        props["srcset"] = ", ".join(srcset)
+        # Without sizes a w-descriptor srcset is invalid and browsers assume
+        # 100vw; lazy images may use auto, the width they are laid out at
+        props["sizes"] = IMAGE_SIZES
+    return props
+
+
+def image_to_leaf(text_node: TextNode, basepath: str, images: dict):
+    props = {"src": rewrite_url(text_node.url, basepath), "alt": text_node.text}
+    props.update(image_props(text_node.url, basepath, images))
+    return LeafNode(tag="img", value="", props=props)
+
+
+LEAF_BUILDERS = {
+    TextType.TEXT: text_to_leaf,
+    TextType.BOLD: bold_to_leaf,
+    TextType.ITALIC: italic_to_leaf,
+    TextType.CODE: code_to_leaf,
+    TextType.LINK: link_to_leaf,
+    TextType.IMAGE: image_to_leaf,
+}
+
+
+def text_node_to_html_node(
+    text_node: TextNode, basepath: str = "/", images: dict = None
+):
+    builder = LEAF_BUILDERS.get(text_node.text_type)
+    if builder is None:
         raise ValueError(f"Invalid text type: {text_node.text_type}")
+    return builder(text_node, basepath, images)
@@ -0,0 +1,59 @@
+import os
+import posixpath
+import re
+
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+def rewrite_url(url: str, basepath: str):
+    # Only site-absolute paths live under the basepath; external, relative and
+    # protocol-relative URLs are left alone
+    if url is None or not url.startswith("/") or url.startswith("//"):
+        return url
+    return basepath.rstrip("/") + url
+
+
+def link_target(url: str, page_path: str):
+    # Site path a link on page_path points to, or None for links that leave
+    # the site or stay on the page. urllib.parse (and the ipaddress module it
+    # loads) is imported here: rendering a page only needs rewrite_url.
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+
+    if parts.path.startswith("/"):
+        path = parts.path
+    else:
+        path = posixpath.join("/", posixpath.dirname(page_path), parts.path)
+    # normpath keeps "//" at the start and drops the trailing slash
+    target = posixpath.normpath(path).lstrip("/")
+    if target and path.endswith("/"):
+        target += "/"
+    return target
+
+
+def target_exists(target: str, site_paths: set):
+    if target in site_paths:
+        return True
+    directory = target if target.endswith("/") or not target else target + "/"
+    return f"{directory}index.html" in site_paths or f"{target}.html" in site_paths
+
+
+def find_broken_links(pages: dict, static_files: list, dest_dir: str):
+    # pages maps each source to its output ("dest") and its link targets
+    site_paths = set(static_files)
+    page_paths = {}
+    for source, page in pages.items():
+        page_path = os.path.relpath(page["dest"], dest_dir).replace(os.sep, "/")
+        site_paths.add(page_path)
+        page_paths[source] = page_path
+
+    broken = []
+    for source, page in sorted(pages.items()):
+        for url in page.get("links", []):
+            target = link_target(url, page_paths[source])
+            if target is not None and not target_exists(target, site_paths):
+                broken.append((source, url))
+    return broken
@@ -0,0 +1,411 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from feeds import write_site_files
+from assets import ASSET_TYPES
+from images import IMAGE_EXTENSIONS
+from main import build, render_context
+from manifest import hash_file, load_manifest, page_key, save_manifest
+from render import page_metadata, render_page
+from render_cache import BlockCache
+from static_sync import copy_file, list_files, remove_output
+from template import asset_urls, load_template
+from text_node import image_registry
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Editors often emit several events per save; wait this long for the rest
+SETTLE_TIME = 0.01
+POLL_INTERVAL = 0.1
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = (
+    "<script>new EventSource(%r).onmessage = () => location.reload();</script>"
+    % RELOAD_PATH
+).encode()
+
+
+class InotifyWatcher:
+    def __init__(self, trees: list, files: list):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        # Directories watched only for some of their files, e.g. the template,
+        # which is watched through its directory so saves via rename are seen
+        self.file_filters = {}
+
+        for tree in trees:
+            self.add_tree(tree)
+        for file in files:
+            trees = self.directories.keys() - self.file_filters.keys()
+            wd = self.add_directory(os.path.dirname(file) or ".")
+            if wd not in trees:
+                self.file_filters.setdefault(wd, set()).add(os.path.normpath(file))
+
+    def add_directory(self, directory: str):
+        path = os.fsencode(directory)
+        wd = self.libc.inotify_add_watch(self.fd, path, WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.directories[wd] = os.path.normpath(directory)
+        return wd
+
+    def add_tree(self, directory: str):
+        for root, _, _ in os.walk(directory):
+            wd = self.add_directory(root)
+            self.file_filters.pop(wd, None)
+
+    def wait(self, timeout: float = None):
+        changes = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            changes.update(self.read_events())
+            ready, _, _ = select.select([self.fd], [], [], SETTLE_TIME)
+        return changes
+
+    def read_events(self):
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.normpath(os.path.join(directory, name))
+            if wd in self.file_filters and path not in self.file_filters[wd]:
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+            yield path
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, trees: list, files: list):
+        self.trees = trees
+        self.files = [os.path.normpath(file) for file in files]
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        paths = list(self.files)
+        for tree in self.trees:
+            paths.extend(os.path.join(tree, file) for file in list_files(tree))
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            snapshot = self.scan()
+            changes = {
+                path
+                for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changes:
+                return changes
+        return set()
+
+    def close(self):
+        pass
+
+
+def create_watcher(trees: list, files: list, polling: bool = False):
+    if not polling:
+        try:
+            return InotifyWatcher(trees, files)
+        except (OSError, AttributeError):
+            # No inotify on this platform or the watch limit was hit
+            pass
+    return PollingWatcher(trees, files)
+
+
+class ReloadNotifier:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, seen: int, timeout: float):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != seen, timeout=timeout)
+            return self.version
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, notifier: ReloadNotifier, **kwargs):
+        self.notifier = notifier
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.stream_reloads()
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?")[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+
+        with open(path, "rb") as file:
+            html = file.read()
+        index = html.rfind(b"</body>")
+        if index == -1:
+            index = len(html)
+        html = html[:index] + RELOAD_SCRIPT + html[index:]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(html)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(html)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        seen = self.notifier.version
+        try:
+            while True:
+                version = self.notifier.wait(seen, timeout=15)
+                if version == seen:
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    self.wfile.write(b"data: reload\n\n")
+                    seen = version
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def serve(directory: str, port: int, notifier: ReloadNotifier):
+    handler = partial(DevRequestHandler, directory=directory, notifier=notifier)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+class SiteWatcher:
+    def __init__(
+        self,
+        basepath: str = "/",
+        content_dir: str = "./content",
+        static_dir: str = "./static",
+        template_path: str = "./template.html",
+        dest_dir: str = "./docs",
+        manifest_path: str = "./.cache/manifest.json",
+    ):
+        self.basepath = basepath
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.dest_dir = os.path.normpath(dest_dir)
+        self.manifest_path = manifest_path
+        self.cache = BlockCache()
+
+    def build(self):
+        build(
+            basepath=self.basepath,
+            incremental=True,
+            cache=self.cache,
+            content_dir=self.content_dir,
+            static_dir=self.static_dir,
+            template_path=self.template_path,
+            dest_dir=self.dest_dir,
+            manifest_path=self.manifest_path,
+        )
+        self.manifest = load_manifest(self.manifest_path)
+        assets = asset_urls(self.manifest["assets"], self.basepath)
+        self.template = load_template(self.template_path, self.basepath, assets)
+        self.template_hash = hash_file(self.template_path)
+        self.images = image_registry(self.manifest["images"])
+        self.context_hash = render_context(self.images, assets, False)
+
+    def page_destination(self, path: str):
+        relative = os.path.relpath(path, self.content_dir)
+        return os.path.join(self.dest_dir, os.path.splitext(relative)[0] + ".html")
+
+    def handle(self, changes: set):
+        # Everything depends on the template, pages embed image sizes and
+        # asset names, and directories moved in or out are easiest to
+        # reconcile through the manifest
+        if (
+            self.template_path in changes
+            or any(self.is_render_input(path) for path in changes)
+            or any(os.path.isdir(path) or self.was_directory(path) for path in changes)
+        ):
+            self.save()
+            self.build()
+            return
+
+        pages_changed = False
+        for path in sorted(changes):
+            if is_under(path, self.content_dir):
+                self.update_page(path)
+                pages_changed = True
+            elif is_under(path, self.static_dir):
+                self.update_static(path)
+        if pages_changed:
+            self.update_site_files()
+
+    def is_render_input(self, path: str):
+        extension = os.path.splitext(path)[1].lower()
+        return is_under(path, self.static_dir) and (
+            extension in IMAGE_EXTENSIONS or extension in ASSET_TYPES
+        )
+
+    def was_directory(self, path: str):
+        if os.path.exists(path):
+            return False
+        prefix = path + os.sep
+        static_prefix = os.path.relpath(path, self.static_dir) + os.sep
+        pages = self.manifest["pages"]
+        return any(source.startswith(prefix) for source in pages) or any(
+            file.startswith(static_prefix) for file in self.manifest["static"]
+        )
+
+    def update_page(self, path: str):
+        dest_path = self.page_destination(path)
+
+        if not os.path.exists(path):
+            self.manifest["pages"].pop(path, None)
+            if os.path.exists(dest_path):
+                print(f"Removing page {dest_path}")
+                remove_output(dest_path, self.dest_dir)
+            return
+
+        print(f"Generating page from {path} to {dest_path}")
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        previous = self.manifest["pages"].get(path, {})
+        document, output, _ = render_page(
+            path,
+            self.template,
+            dest_path,
+            self.basepath,
+            self.cache,
+            previous.get("output"),
+            self.images,
+        )
+        source_key = page_key(
+            hash_file(path), self.template_hash, self.basepath, self.context_hash
+        )
+        self.manifest["pages"][path] = {
+            "key": source_key,
+            "dest": dest_path,
+            "mtime": os.path.getmtime(path),
+            "output": output,
+            **page_metadata(document),
+        }
+
+    def update_site_files(self):
+        self.manifest["generated"], _ = write_site_files(
+            self.manifest["pages"],
+            self.dest_dir,
+            self.template,
+            self.basepath,
+            previous=self.manifest.get("generated"),
+        )
+
+    def update_static(self, path: str):
+        relative = os.path.relpath(path, self.static_dir)
+        dest_path = os.path.join(self.dest_dir, relative)
+        static_files = set(self.manifest["static"])
+
+        if os.path.exists(path):
+            print(f"Copying {path} to {dest_path}")
+            copy_file(path, dest_path)
+            static_files.add(relative)
+        else:
+            static_files.discard(relative)
+            if os.path.exists(dest_path):
+                print(f"Removing {dest_path}")
+                remove_output(dest_path, self.dest_dir)
+        self.manifest["static"] = sorted(static_files)
+
+    def save(self):
+        save_manifest(self.manifest, self.manifest_path)
+
+
+def is_under(path: str, directory: str):
+    return path.startswith(directory + os.sep)
+
+
+def main(basepath: str = "/", port: int = 8888, poll: bool = False):
+    site = SiteWatcher(basepath=basepath)
+    site.build()
+
+    notifier = ReloadNotifier()
+    server = serve(site.dest_dir, port, notifier)
+    watcher = create_watcher(
+        trees=[site.content_dir, site.static_dir],
+        files=[site.template_path],
+        polling=poll,
+    )
+    print(f"Watching for changes, serving {site.dest_dir} on port {port}")
+
+    try:
+        while True:
+            changes = watcher.wait()
+            start = time.perf_counter()
+            try:
+                site.handle(changes)
+            except (OSError, ValueError) as error:
+                # Half-written or invalid sources shouldn't stop the server
+                print(f"Rebuild failed: {error}")
+                continue
+            notifier.notify()
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        server.shutdown()
+        site.save()
+
+
+if __name__ == "__main__":
+    from cli import main as cli_main
+
+    cli_main(["watch", *sys.argv[1:]])